@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import backends
+import generator
+from bench_linearization import variant_instances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of each solver backend on the same models, and whether they agree.")
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--flows", type=int, default=2)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--linearization", default="mccormick")
+    parser.add_argument("--time-limit", type=float, default=60)
+    args = parser.parse_args()
+
+    total_seconds = {backend: 0.0 for backend in backends.BACKENDS}
+    solved = 0
+    disagreements = 0
+    print("seed\tvariant\tbackend\tstatus\tobjective\tbuild_seconds\tsolve_seconds")
+    for seed in range(args.seeds):
+        G = generator.planted_decomposition(args.nodes, args.k, args.flows, seed)[0]
+        for variant, make_decomp in variant_instances(G, args.flows, args.k, seed):
+            outcomes = []
+            for backend in backends.BACKENDS:
+                start = time.perf_counter()
+                myDecomp = make_decomp(linearization=args.linearization, names=False, backend=backend)
+                myDecomp.build_model()
+                myDecomp.model.update()
+                build_seconds = time.perf_counter() - start
+                myDecomp.model.setParam("OutputFlag", 0)
+                myDecomp.model.setParam("TimeLimit", args.time_limit)
+                start = time.perf_counter()
+                myDecomp.model.optimize()
+                solve_seconds = time.perf_counter() - start
+                total_seconds[backend] += build_seconds + solve_seconds
+                objective = myDecomp.model.ObjVal if myDecomp.model.SolCount > 0 else float("inf")
+                outcomes.append((myDecomp.model.status, objective))
+                print(f"{seed}\t{variant}\t{backend}\t{myDecomp.model.status}\t{objective:g}\t{build_seconds:.3f}\t{solve_seconds:.3f}")
+            solved += 1
+            if any(status != outcomes[0][0] or not backends.same_objective(objective, outcomes[0][1]) for status, objective in outcomes):
+                disagreements += 1
+
+    for backend in backends.BACKENDS:
+        print(f"# {backend}: {solved} models in {total_seconds[backend]:.2f}s, {solved / total_seconds[backend]:.2f} models/s", file=sys.stderr)
+    print(f"# backends disagree on {disagreements} of {solved} models", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import branchprice
+import generator
+import CommonFlowDecomp as CFD
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fewest paths of CommonFlowDecomp with each engine on the same instances, and whether they agree.")
+    parser.add_argument("--nodes", type=int, default=30)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--flows", type=int, default=2)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=60)
+    args = parser.parse_args()
+
+    total_seconds = {engine: 0.0 for engine in branchprice.ENGINES}
+    disagreements = 0
+    print("seed\tengine\tk\tstatus\tmodels\tseconds")
+    for seed in range(args.seeds):
+        G = generator.planted_decomposition(args.nodes, args.k, args.flows, seed)[0]
+        found = []
+        for engine in branchprice.ENGINES:
+            decomp = CFD.CommonFlowDecomp(G, args.flows, args.k, engine=engine, time_limit=args.time_limit)
+            start = time.perf_counter()
+            decomp.solve()
+            seconds = time.perf_counter() - start
+            total_seconds[engine] += seconds
+            k = decomp.result.k if decomp.result is not None else None
+            status = decomp.result.status if decomp.result is not None else None
+            found.append(k)
+            print(f"{seed}\t{engine}\t{k}\t{status}\t{len(decomp.stats.models)}\t{seconds:.3f}")
+        if any(k != found[0] for k in found):
+            disagreements += 1
+
+    for engine in branchprice.ENGINES:
+        print(f"# {engine}: {args.seeds} instances in {total_seconds[engine]:.2f}s", file=sys.stderr)
+    print(f"# engines disagree on {disagreements} of {args.seeds} instances", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
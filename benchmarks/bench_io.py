@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import generator
+import graphio
+
+
+def instances(count: int, num_nodes: int, k: int, num_flows: int):
+    for seed in range(count):
+        G = generator.planted_decomposition(num_nodes, k, num_flows, seed)[0]
+        G.graph["name"] = f"planted_{seed}"
+        yield G
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write and stream back a collection of multi-flow graphs in the text and binary formats.")
+    parser.add_argument("--graphs", type=int, default=10000)
+    parser.add_argument("--nodes", type=int, default=40)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--flows", type=int, default=3)
+    args = parser.parse_args()
+
+    print("format\tbytes\twrite_s\tread_arrays_s\tread_digraphs_s\tpeak_mb")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write in (("text", graphio.write_text), ("binary", graphio.write_binary)):
+            path = os.path.join(directory, f"graphs.{name}")
+            start = time.perf_counter()
+            write(path, instances(args.graphs, args.nodes, args.k, args.flows))
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            edges = sum(graph.num_edges for graph in graphio.read_graphs(path, arrays=True))
+            arrays_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            count = sum(1 for G in graphio.read_graphs(path))
+            digraphs_seconds = time.perf_counter() - start
+
+            # a separate pass, as tracing every allocation slows the reader down several times
+            tracemalloc.start()
+            for G in graphio.read_graphs(path):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert count == args.graphs and edges > 0
+            print(f"{name}\t{os.path.getsize(path)}\t{write_seconds:.2f}\t{arrays_seconds:.2f}\t{digraphs_seconds:.2f}\t{peak / 2**20:.1f}")
+
+
+if __name__ == "__main__":
+    main()
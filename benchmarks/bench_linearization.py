@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import products
+import generator
+import kCommonFlowDecomp as kCFD
+import kCommonFlowDecompBoundedErr as kCFDBE
+import kCommonFlowDecompInexact as kCFDI
+import kCommonFlowDecompMinErr as kCFDME
+import kCommonFlowDecompMinPathErr as kCFDPE
+
+
+def variant_instances(G, num_flows: int, k: int, seed: int):
+    # the planted instance as each variant expects it: exact, with +-1 noise, or widened to +-1 bounds
+    noisy = generator.add_noise(G, 1, seed)
+    inexact = generator.widen(G, 1)
+    return [
+        ("exact", lambda **kw: kCFD.KCommonFlowDecomp(G, num_flows, k, **kw)),
+        ("bounded", lambda **kw: kCFDBE.KCommonFlowDecompBoundedErr(noisy, num_flows, k, 1, **kw)),
+        ("inexact", lambda **kw: kCFDI.KCommonFlowDecompInexact(inexact, num_flows, k, **kw)),
+        ("min_err", lambda **kw: kCFDME.KCommonFlowDecompMinErr(noisy, num_flows, k, **kw)),
+        ("min_path_err", lambda **kw: kCFDPE.KCommonFlowDecompMinPathErr(noisy, num_flows, k, **kw)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model size, build time and solve time of each product linearization.")
+    parser.add_argument("--nodes", type=int, default=30)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--flows", type=int, default=3)
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--builder", default="python")
+    parser.add_argument("--time-limit", type=float, default=60)
+    args = parser.parse_args()
+
+    print("seed\tvariant\tlinearization\tvars\tconstrs\tgenconstrs\tbuild_seconds\tstatus\tsolve_seconds")
+    for seed in range(args.seeds):
+        G = generator.planted_decomposition(args.nodes, args.k, args.flows, seed)[0]
+        for variant, make_decomp in variant_instances(G, args.flows, args.k, seed):
+            for linearization in products.LINEARIZATIONS:
+                start = time.perf_counter()
+                myDecomp = make_decomp(builder=args.builder, linearization=linearization, names=False)
+                myDecomp.build_model()
+                myDecomp.model.update()
+                build_seconds = time.perf_counter() - start
+                myDecomp.model.setParam("OutputFlag", 0)
+                myDecomp.model.setParam("TimeLimit", args.time_limit)
+                myDecomp.model.optimize()
+                print(f"{seed}\t{variant}\t{linearization}\t{myDecomp.model.NumVars}\t{myDecomp.model.NumConstrs}\t"
+                      f"{myDecomp.model.NumGenConstrs}\t{build_seconds:.3f}\t{myDecomp.model.status}\t{myDecomp.model.Runtime:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import re
+import sys
+import io
+import json
+import time
+import argparse
+import resource
+import datetime
+import subprocess
+import contextlib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import batch
+import generator
+import flowgraph
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import CommonFlowDecompInexact as CFDI
+import CommonFlowDecompMinErr as CFDME
+import CommonFlowDecompMinPathErr as CFDPE
+import kCommonFlowDecomp as kCFD
+import kCommonFlowDecompBoundedErr as kCFDBE
+import kCommonFlowDecompInexact as kCFDI
+import kCommonFlowDecompMinErr as kCFDME
+import kCommonFlowDecompMinPathErr as kCFDPE
+
+# variant -> (driver, k class, instance the variant reads, extra maximum_k the driver's loop needs)
+DRIVERS = {
+    "exact": (CFD.CommonFlowDecomp, kCFD.KCommonFlowDecomp, "exact", 0),
+    "bounded": (CFDBE.CommonFlowDecompBoundedErr, kCFDBE.KCommonFlowDecompBoundedErr, "noisy", 1),
+    "inexact": (CFDI.CommonFlowDecompInexact, kCFDI.KCommonFlowDecompInexact, "inexact", 1),
+    "min_err": (CFDME.CommonFlowDecompMinErr, kCFDME.KCommonFlowDecompMinErr, "noisy", 0),
+    "min_path_err": (CFDPE.CommonFlowDecompMinPathErr, kCFDPE.KCommonFlowDecompMinPathErr, "noisy", 0),
+}
+K_FOUND = re.compile(r"(?:Found a solution with|Optimal solution:) (\d+) distinct paths")
+TOLERANCE = 1e-6
+
+
+class SuiteRun:
+    # one driver on one planted instance; run as a batch job so every run gets a fresh process and
+    # max_rss_mb is the peak of that run alone (plus the interpreter)
+    def __init__(self, G, variant: str, seed: int, num_flows: int, k: int, paths: list, weights: list, noise: int, width: int,
+                 backend: str, time_limit: float):
+        self.G = G
+        self.variant = variant
+        self.seed = seed
+        self.num_flows = num_flows
+        self.k = k
+        self.paths = paths
+        self.weights = weights
+        self.noise = noise
+        self.width = width
+        self.backend = backend
+        self.time_limit = time_limit
+
+    def solve(self):
+        driver_class, k_class, instance, extra_k = DRIVERS[self.variant]
+        instances = {"exact": self.G, "noisy": generator.add_noise(self.G, self.noise, self.seed), "inexact": generator.widen(self.G, self.width)}
+        G = instances[instance]
+        k_kwargs = dict(error_bound=self.noise) if self.variant == "bounded" else {}
+        record = dict(variant=self.variant, seed=self.seed, nodes=G.number_of_nodes(), edges=G.number_of_edges(), flows=self.num_flows,
+                      k_planted=self.k, noise=self.noise if instance == "noisy" else 0, width=self.width if instance == "inexact" else 0,
+                      backend=self.backend)
+
+        # the driver end to end: its k search and its answer
+        myDriver = driver_class(G, self.num_flows, self.k + extra_k, backend=self.backend, **k_kwargs)
+        captured = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(captured):
+            answer = myDriver.solve(output=True) if self.variant == "min_err" else myDriver.solve()
+        record["driver_seconds"] = time.perf_counter() - start
+        matches = K_FOUND.findall(answer if isinstance(answer, str) else captured.getvalue())
+        k_found = int(matches[-1]) if matches else (len(answer) if isinstance(answer, list) else None)
+        record["k_found"] = k_found
+
+        # the model at the k the driver settled on: its size, build and solve time, and its solution
+        if k_found:
+            start = time.perf_counter()
+            myDecomp = k_class(G, self.num_flows, k_found, backend=self.backend, names=False, **k_kwargs)
+            myDecomp.build_model()
+            myDecomp.model.update()
+            record["build_seconds"] = time.perf_counter() - start
+            myDecomp.model.setParam("OutputFlag", 0)
+            myDecomp.model.setParam("TimeLimit", self.time_limit)
+            start = time.perf_counter()
+            myDecomp.model.optimize()
+            record["solve_seconds"] = time.perf_counter() - start
+            record.update(vars=myDecomp.model.NumVars, constrs=myDecomp.model.NumConstrs, nonzeros=myDecomp.model.NumNZs)
+            res = myDecomp.get_result()
+            record.update(status=res.status, objective=res.objective)
+            record.update(self.check(myDecomp.flow_graph, res))
+        record["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return record
+
+    def check(self, flow_graph: flowgraph.FlowGraph, res):
+        # correctness against the planted decomposition: does the solution satisfy the variant's flow
+        # condition, and how many of the planted paths did it find
+        planted = {tuple(path) for path in self.paths}
+        found = {tuple(path) for path in res.paths}
+        checks = dict(paths_recovered=len(planted & found) / len(planted), valid=None)
+        if not res.paths:
+            return checks
+        explained = np.zeros((flow_graph.num_edges, flow_graph.num_flows))
+        for path, weights in zip(res.paths, np.asarray(res.weights, dtype=float)):
+            for u, v in zip(path[:-1], path[1:]):
+                explained[flow_graph.edge_ids[u, v]] += weights
+        if self.variant == "exact":
+            checks["valid"] = bool(np.allclose(explained, flow_graph.flows, atol=TOLERANCE))
+        elif self.variant == "bounded":
+            checks["valid"] = bool((np.abs(explained - flow_graph.flows) <= self.noise + TOLERANCE).all())
+        elif self.variant == "inexact":
+            checks["valid"] = bool(((flow_graph.flows[:, :, 0] - TOLERANCE <= explained) & (explained <= flow_graph.flows[:, :, 1] + TOLERANCE)).all())
+        elif self.variant == "min_err":
+            # the model only lets paths fall short of the flows, so the check is that they never exceed them
+            # and that the objective is what they leave unexplained; the planted paths' error is for reference
+            truth = flowgraph.FlowGraph(self.G, self.num_flows, "flow").flows
+            checks["planted_error"] = float(np.abs(flow_graph.flows - truth).sum())
+            checks["valid"] = bool((explained <= flow_graph.flows + TOLERANCE).all()
+                                   and abs((flow_graph.flows - explained).sum() - res.objective) <= TOLERANCE * max(1, res.objective))
+        return checks
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def jobs(args):
+    for nodes in args.nodes:
+        for k in args.k:
+            for num_flows in args.flows:
+                for seed in range(args.seeds):
+                    G, paths, weights = generator.planted_decomposition(nodes, k, num_flows, seed)
+                    for variant in args.drivers:
+                        yield G, dict(variant=variant, seed=seed, num_flows=num_flows, k=k, paths=paths, weights=weights,
+                                      noise=args.noise, width=args.width, backend=args.backend, time_limit=args.time_limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build time, solve time, model size, memory and correctness of every driver on planted instances.")
+    parser.add_argument("--nodes", type=lambda s: [int(x) for x in s.split(",")], default=[15, 30])
+    parser.add_argument("--k", type=lambda s: [int(x) for x in s.split(",")], default=[3, 5])
+    parser.add_argument("--flows", type=lambda s: [int(x) for x in s.split(",")], default=[2, 3])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--drivers", type=lambda s: s.split(","), default=list(DRIVERS))
+    parser.add_argument("--noise", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1)
+    parser.add_argument("--backend", default="gurobi")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--output", help="append JSON lines here instead of printing them")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    job_list = list(jobs(args))
+    out = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for res in batch.solve_batch(job_list, SuiteRun, args.workers, args.threads, args.timeout):
+            params = {key: value for key, value in job_list[res.index][1].items() if key not in ("paths", "weights")}
+            record = res.value if res.status == "ok" else dict(params, error=res.error)
+            record.update(commit=commit, timestamp=timestamp, job=res.index, status=record.get("status", res.status))
+            print(json.dumps(record), file=out, flush=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
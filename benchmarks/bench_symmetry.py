@@ -0,0 +1,33 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import kCommonFlowDecomp as kCFD
+import generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Branch-and-bound node counts with and without symmetry breaking.")
+    parser.add_argument("--nodes", type=int, default=12)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--flows", type=int, default=2)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=60)
+    args = parser.parse_args()
+
+    print("seed\tk\tsymmetry\tstatus\tnodes\tseconds")
+    for seed in range(args.seeds):
+        G = generator.planted_decomposition(args.nodes, args.k, args.flows, seed)[0]
+        # k-1 is usually infeasible, which is where symmetric branching hurts most
+        for k in (args.k - 1, args.k):
+            for symmetry_breaking in (None, "weight", "source_edge"):
+                myDecomp = kCFD.KCommonFlowDecomp(G, args.flows, k, symmetry_breaking=symmetry_breaking)
+                myDecomp.build_model()
+                myDecomp.model.setParam("TimeLimit", args.time_limit)
+                myDecomp.solve_model()
+                print(f"{seed}\t{k}\t{symmetry_breaking}\t{myDecomp.model.status}\t{int(myDecomp.model.NodeCount)}\t{myDecomp.model.Runtime:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,195 @@
 import networkx as nx
 import kCommonFlowDecomp as kCFD
+import flowgraph
+import instrument
+import utils
+import ksearch
+import cache as decomp_cache
+import presolve as decomp_presolve
+import pathcount
+import branchprice
 
 class CommonFlowDecomp:
-    def __init__(self, G: nx.DiGraph, num_flows: int, maximum_k: int, flow_attr: str = "flow", subpath_constr: list = []):
+    def __init__(self, G: nx.DiGraph, num_flows: int, maximum_k: int, flow_attr: str = "flow", subpath_constr: list = [], incremental: bool = False, use_lower_bound: bool = True, use_heuristic: bool = True, parallel: bool = False, workers: int = None, threads: int = None, search: str = "linear", k_upper_bound: int = None, symmetry_breaking: str = None, builder: str = "python", linearization: str = "mccormick", names: bool = True, backend: str = "gurobi", hook=None, time_limit: float = None, k_time_limit: float = None, mip_gap: float = None, callback=None, cache=None, presolve: bool = True, proportional_flows: bool = False, engine: str = "compact"):
         self.G = G
         self.num_flows = num_flows
         self.maximum_k = maximum_k
         self.flow_attr = flow_attr
         self.subpath_constr = subpath_constr
-        
+        self.symmetry_breaking = symmetry_breaking
+        self.builder = builder
+        self.linearization = linearization
+        self.names = names
+        self.backend = backend
+        # per-phase times and one record per k solved; hook gets each record as it comes
+        self.stats = instrument.RunStats(hook)
+        with self.stats.phase("flow_graph"):
+            self.flow_graph = flowgraph.FlowGraph(G, num_flows, flow_attr)
+        # checked as given, as the graph presolve reduces it to can conserve flow where the input does not
+        self.flow_graph.validate(conserving=True)
+        self.incremental = incremental
+        self.use_lower_bound = use_lower_bound
+        self.use_heuristic = use_heuristic
+        self.parallel = parallel
+        self.workers = workers
+        self.threads = threads
+        if search not in ("linear", "galloping", "single"):
+            print("uh oh")
+            raise ValueError(f"Unknown search strategy {search}. Use 'linear', 'galloping' or 'single'.")
+        self.search = search
+        self.k_upper_bound = k_upper_bound
+        # "branch_price" finds the fewest paths by branch-and-price over path variables (see branchprice.py)
+        # in one search over k instead of one compact model per k; search, parallel and the model options
+        # do not apply to it
+        branchprice.check_engine(engine, backend, subpath_constr)
+        self.engine = engine
+        # time_limit bounds the whole solve() and is spread over the k values left; when it runs out the best
+        # solution so far is returned (self.result says which). callback gets every incumbent as a DecompResult.
+        self.budget = ksearch.Budget(time_limit, k_time_limit, mip_gap)
+        self.callback = callback
+        self.result = None
+        # an optional cache.MemoryCache or cache.DiskCache of finished solves and of the k proven infeasible
+        self.cache = cache
+        self.problem_key = decomp_cache.problem_key(type(self).__name__, self.flow_graph, subpath_constr) if cache is not None else None
+        # presolve drops the edges no path of positive weight can use, contracts unary chains and merges equal
+        # flows (and, with proportional_flows, flows that are multiples of one another); self.G, self.num_flows and
+        # self.subpath_constr are then the reduced ones, and the results expand back onto self.original_G
+        self.original_G = G
+        if presolve:
+            with self.stats.phase("presolve"):
+                self.G, self.flow_graph = decomp_presolve.reduce_graph(G, self.flow_graph, subpath_constr)
+                self.G, self.flow_graph, self.subpath_constr = decomp_presolve.contract_chains(self.G, self.flow_graph, subpath_constr)
+                self.G, self.flow_graph = decomp_presolve.collapse_flows(self.G, self.flow_graph, proportional_flows, self.subpath_constr)
+                self.num_flows = self.flow_graph.num_flows
+
+    @instrument.timed("solve")
     def solve(self, output: bool = False):
-        for k in range(1,self.maximum_k + 1):
-            myDecomp = kCFD.KCommonFlowDecomp(self.G, self.num_flows, k, self.flow_attr, self.subpath_constr)
-            myDecomp.build_model()
-            if myDecomp.solve_model():
+        paths, cached = decomp_cache.cached_solve(self, lambda: (self.search_k(output), True), verdicts=True)
+        if cached and output and self.result is not None:
+            print(f"Found a solution with {self.result.k} distinct paths:\n" + self.result.format())
+        return paths
+
+    def search_k(self, output: bool = False):
+        with self.stats.phase("lower_bound"):
+            self.k_lower_bound = utils.get_k_lower_bound(self.G, self.num_flows, self.flow_attr) if self.use_lower_bound else 1
+        if self.cache is not None:
+            self.k_lower_bound = max(self.k_lower_bound, decomp_cache.known_infeasible(self.cache, self.problem_key) + 1)
+        with self.stats.phase("heuristic"):
+            self.heuristic_start = self.get_heuristic_start()
+        k_max = self.maximum_k
+        k_upper = self.k_upper_bound
+        if self.heuristic_start is not None:
+            # the greedy paths already solve k = len(paths), so no larger k is ever needed
+            k_max = min(k_max, len(self.heuristic_start[0]))
+            k_upper = len(self.heuristic_start[0]) if k_upper is None else min(k_upper, len(self.heuristic_start[0]))
+        if output:
+            print(f"Starting search at k={self.k_lower_bound}")
+        if self.engine == "branch_price":
+            return self.solve_branch_price(k_max, output)
+        if self.search == "single":
+            return self.solve_single(k_max, output)
+        if self.parallel:
+            result = ksearch.parallel_k_search(kCFD.KCommonFlowDecomp, dict(self.decomp_kwargs(), hook=None),
+                                               self.k_lower_bound, k_max, self.workers, self.threads,
+                                               on_stats=self.stats.add_model, params=self.budget.params())
+            if result is None:
+                return self.expired_answer(output)
+            k, self.result = result
+            if output:
+                print(f"Found a solution with {k} distinct paths:\n" + self.result.format())
+            return self.result.paths
+        if self.search == "galloping":
+            result = ksearch.galloping_k_search(self.solve_k, self.k_lower_bound, k_max, k_upper, discard=lambda decomp: decomp.dispose())
+            if result is None:
+                return self.expired_answer(output)
+            k, myDecomp = result
+            self.result = myDecomp.get_result()
+            paths = myDecomp.get_model_paths()
+            if output:
+                print(f"Found a solution with {k} distinct paths:\n" + myDecomp.get_model_solution())
+            myDecomp.dispose()
+            return paths
+        myDecomp = None
+        for k in range(self.k_lower_bound, k_max + 1):
+            if self.budget.expired():
+                break
+            if self.incremental and k > self.k_lower_bound:
+                myDecomp.add_path()
+            else:
+                if myDecomp is not None:
+                    myDecomp.dispose()
+                myDecomp = kCFD.KCommonFlowDecomp(k=k, **self.decomp_kwargs())
+                myDecomp.build_model()
+            ksearch.apply_heuristic_start(self, myDecomp)
+            self.budget.apply(myDecomp.model, k_max - k + 1)
+            if myDecomp.solve_model(self.callback):
+                self.result = myDecomp.get_result()
                 paths = myDecomp.get_model_paths()
                 if output:
                     print(f"Found a solution with {k} distinct paths:\n" + myDecomp.get_model_solution())
+                myDecomp.dispose()
                 return paths
-        return "No solution found in specified range of k."
\ No newline at end of file
+        if myDecomp is not None:
+            myDecomp.dispose()
+        return self.expired_answer(output)
+
+    def solve_single(self, k_max: int, output: bool = False):
+        # one model with k_max candidate paths that minimizes how many of them are used
+        if self.k_lower_bound > k_max:
+            return self.expired_answer(output)
+        myDecomp = kCFD.KCommonFlowDecomp(k=k_max, minimize_paths=True, **self.decomp_kwargs())
+        myDecomp.build_model()
+        pathcount.set_path_range(myDecomp, self.k_lower_bound, k_max)
+        ksearch.apply_heuristic_start(self, myDecomp)
+        self.budget.apply(myDecomp.model)
+        if not myDecomp.solve_model(self.callback):
+            myDecomp.dispose()
+            return self.expired_answer(output)
+        self.result = myDecomp.get_result()
+        myDecomp.dispose()
+        if output:
+            print(f"Found a solution with {self.result.k} distinct paths:\n" + self.result.format())
+        return self.result.paths
+
+    def solve_branch_price(self, k_max: int, output: bool = False):
+        if self.k_lower_bound > k_max:
+            return self.expired_answer(output)
+        engine = branchprice.BranchAndPrice(self.G, self.num_flows, self.flow_attr, self.subpath_constr, flow_graph=self.flow_graph,
+                                            hook=self.stats.add_model)
+        self.result = engine.solve(self.k_lower_bound, k_max, self.heuristic_start, self.budget, self.callback)
+        engine.dispose()
+        if self.result is None:
+            return self.expired_answer(output)
+        if output:
+            print(f"Found a solution with {self.result.k} distinct paths:\n" + self.result.format())
+        return self.result.paths
+
+    def solve_k(self, k: int):
+        # a k cut off by the time limit counts as infeasible, so the search may settle on a larger k
+        if self.budget.expired():
+            return None
+        myDecomp = kCFD.KCommonFlowDecomp(k=k, **self.decomp_kwargs())
+        myDecomp.build_model()
+        ksearch.apply_heuristic_start(self, myDecomp)
+        self.budget.apply(myDecomp.model, (self.maximum_k - self.k_lower_bound + 1).bit_length())
+        if myDecomp.solve_model(self.callback):
+            return myDecomp
+        myDecomp.dispose()
+        return None
+
+    def expired_answer(self, output: bool = False):
+        result = ksearch.heuristic_result(self)
+        if result is None:
+            return "No solution found in specified range of k."
+        if output:
+            print(f"Time limit reached; heuristic solution with {result.k} distinct paths:\n" + result.format())
+        return result.paths
+
+    def get_heuristic_start(self):
+        # greedy (paths, weights) that already satisfy the model, or None
+        flows = self.flow_graph.upper_flows()
+        return ksearch.heuristic_start(self, flows, flows)
+
+    def decomp_kwargs(self):
+        return dict(G=self.G, num_flows=self.num_flows, flow_attr=self.flow_attr, subpath_constr=self.subpath_constr, symmetry_breaking=self.symmetry_breaking,
+                    builder=self.builder, linearization=self.linearization, names=self.names, backend=self.backend, flow_graph=self.flow_graph, hook=self.stats.add_model)
\ No newline at end of file
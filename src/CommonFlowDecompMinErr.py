@@ -1,32 +1,164 @@
 import networkx as nx
+import gurobipy as gb
 import kCommonFlowDecompMinErr as kCFDME
+import flowgraph
+import instrument
+import backends
+import ksearch
+import cache as decomp_cache
+import pathcount
 
 class CommonFlowDecompMinErr:
-    def __init__(self, G: nx.DiGraph, num_flows: int, maximum_k: int, flow_attr: str = "flow", subpath_constr: list = []):
+    def __init__(self, G: nx.DiGraph, num_flows: int, maximum_k: int, flow_attr: str = "flow", subpath_constr: list = [], warm_start: bool = True, incremental: bool = False, symmetry_breaking: str = None, builder: str = "python", linearization: str = "mccormick", names: bool = True, backend: str = "gurobi", hook=None, time_limit: float = None, k_time_limit: float = None, mip_gap: float = None, callback=None, cache=None, search: str = "linear", path_cost: float = None, pareto: bool = False):
         self.G = G
         self.num_flows = num_flows
         self.maximum_k = maximum_k
         self.flow_attr = flow_attr
         self.subpath_constr = subpath_constr
+        self.symmetry_breaking = symmetry_breaking
+        self.builder = builder
+        self.linearization = linearization
+        self.names = names
+        self.backend = backend
+        # per-phase times and one record per k solved; hook gets each record as it comes
+        self.stats = instrument.RunStats(hook)
+        with self.stats.phase("flow_graph"):
+            self.flow_graph = flowgraph.FlowGraph(G, num_flows, flow_attr)
+        self.warm_start = warm_start
+        self.incremental = incremental
+        # "single" solves one model with maximum_k candidate paths for the least error and then the fewest paths
+        # (or for error + path_cost per path); with pareto it also keeps, in self.pareto_front, the least error
+        # of every k that lowers it. So "single" returns the fewest paths (at least one) at the least error, while
+        # "linear" keeps the original loop's answer: the paths of the first k that no longer lowers the error,
+        # one more than that error needs unless it reaches 0.
+        if search not in ("linear", "single"):
+            print("uh oh")
+            raise ValueError(f"Unknown search strategy {search}. Use 'linear' or 'single'.")
+        self.search = search
+        self.path_cost = path_cost
+        self.pareto = pareto
+        self.pareto_front = []
+        # time_limit bounds the whole solve() and is spread over the k values left; when it runs out the best
+        # solution so far is returned (self.result holds it). callback gets every incumbent as a DecompResult.
+        self.budget = ksearch.Budget(time_limit, k_time_limit, mip_gap)
+        self.callback = callback
+        self.result = None
+        # an optional cache.MemoryCache or cache.DiskCache of finished solves
+        self.cache = cache
+        self.problem_key = decomp_cache.problem_key(type(self).__name__, self.flow_graph, subpath_constr, search=search, path_cost=path_cost, pareto=pareto) if cache is not None else None
         
+    @instrument.timed("solve")
     def solve(self, output: bool = False):
+        paths, cached = decomp_cache.cached_solve(self, lambda: self.search_k(output))
+        if cached and output:
+            print(f"Optimal solution: {self.result.k} distinct paths and total error {self.result.objective}:\n{self.result.format()}")
+        return paths
+
+    def search_k(self, output: bool = False):
+        # (paths, whether they are proven optimal)
+        if self.search == "single":
+            return self.solve_single(output)
         last_obj = float("inf")
+        last_paths = None
+        last_weights = None
+        last_solution = ""
+        paths = []
+        myDecomp = None
         for k in range(1,self.maximum_k+2):
-            myDecomp = kCFDME.KCommonFlowDecompMinErr(self.G, self.num_flows, k, self.flow_attr, self.subpath_constr)
-            myDecomp.build_model()
-            new_obj = myDecomp.solve_model()
+            if self.budget.expired():
+                if myDecomp is not None:
+                    myDecomp.dispose()
+                if output:
+                    print(f"Time limit reached; best solution: {len(last_paths or [])} distinct paths and total error {last_obj}:\n{last_solution}")
+                return last_paths or [], False
+            if self.incremental and k > 1:
+                myDecomp.add_path()
+            else:
+                if myDecomp is not None:
+                    myDecomp.dispose()
+                myDecomp = kCFDME.KCommonFlowDecompMinErr(k=k, **self.decomp_kwargs())
+                myDecomp.build_model()
+            if self.warm_start and last_paths is not None:
+                myDecomp.warm_start(last_paths, last_weights, last_obj)
+            self.budget.apply(myDecomp.model, self.maximum_k + 2 - k)
+            new_obj = myDecomp.solve_model(self.callback)
+            if new_obj == float("inf"):
+                # stopped by the time limit without any solution for this k
+                continue
             paths = myDecomp.get_model_paths()
-            del myDecomp
-            if new_obj < last_obj:
-                last_obj = new_obj
-            elif new_obj == last_obj:
+            weights = myDecomp.get_model_weights()
+            if output:
+                solution = myDecomp.get_model_solution()
+            improved = not backends.same_objective(new_obj, last_obj) and new_obj < last_obj
+            if improved:
+                self.result = myDecomp.get_result()
+            if backends.same_objective(new_obj, last_obj):
+                # k paths do no better than the k - 1 in self.result, which are the answer
                 if output:
-                    print(f"Optimal solution: {k - 1} distinct paths and total error {last_obj}:\n{last_solution}")
-                return paths
-            if new_obj == 0:
+                    print(f"Optimal solution: {self.result.k} distinct paths and total error {last_obj}:\n{last_solution}")
+                myDecomp.dispose()
+                return last_paths, True
+            if not improved:
+                # cut off by the time limit before it beat k - 1; keep the better decomposition
+                continue
+            last_obj = new_obj
+            if backends.same_objective(new_obj, 0):
                 if output:
-                    print(f"Optimal solution: {k} distinct paths and total error {last_obj}:\n{last_solution}")
-                return paths
+                    print(f"Optimal solution: {k} distinct paths and total error {last_obj}:\n{solution}")
+                myDecomp.dispose()
+                return paths, True
+            last_paths = paths
+            last_weights = weights
+            if output:
+                last_solution = solution
+        if myDecomp is not None:
+            myDecomp.dispose()
         if output:
             print("No optimal solution found in specified range of k.")
-        return paths
\ No newline at end of file
+        return last_paths or paths, False
+
+    def solve_single(self, output: bool = False):
+        myDecomp = kCFDME.KCommonFlowDecompMinErr(k=self.maximum_k, minimize_paths=True, path_cost=None if self.pareto else self.path_cost,
+                                                  **self.decomp_kwargs())
+        myDecomp.build_model()
+        if self.pareto:
+            optimal = self.solve_pareto(myDecomp)
+            if output:
+                for point in self.pareto_front:
+                    print(f"Found a solution with {point.k} distinct paths and total error {point.objective}")
+        else:
+            optimal = pathcount.solve(myDecomp, self.callback, self.budget) and myDecomp.model.status == gb.GRB.OPTIMAL
+            self.result = myDecomp.get_result() if myDecomp.model.SolCount > 0 else None
+        myDecomp.dispose()
+        if self.result is None:
+            if output:
+                print("No solution found within the time limit.")
+            return [], False
+        if output:
+            print(f"{'Optimal' if optimal else 'Best'} solution: {self.result.k} distinct paths and total error {self.result.objective}:\n{self.result.format()}")
+        return self.result.paths, optimal
+
+    def solve_pareto(self, myDecomp):
+        # caps the paths in use at k = 1, 2, ... on the same model; True if every point is proven optimal
+        self.pareto_front = []
+        optimal = True
+        for k in range(1, self.maximum_k + 1):
+            if self.budget.expired():
+                return False
+            pathcount.set_path_range(myDecomp, 1, k)
+            self.budget.apply(myDecomp.model, self.maximum_k + 1 - k)
+            if myDecomp.solve_model(self.callback) == float("inf"):
+                optimal = False
+                continue
+            optimal = optimal and myDecomp.model.status == gb.GRB.OPTIMAL
+            point = myDecomp.get_result()
+            if not self.pareto_front or (point.objective < self.pareto_front[-1].objective and not backends.same_objective(point.objective, self.pareto_front[-1].objective)):
+                self.pareto_front.append(point)
+                self.result = point
+            if backends.same_objective(point.objective, 0):
+                break
+        return optimal
+
+    def decomp_kwargs(self):
+        return dict(G=self.G, num_flows=self.num_flows, flow_attr=self.flow_attr, subpath_constr=self.subpath_constr, symmetry_breaking=self.symmetry_breaking,
+                    builder=self.builder, linearization=self.linearization, names=self.names, backend=self.backend, flow_graph=self.flow_graph, hook=self.stats.add_model)
\ No newline at end of file
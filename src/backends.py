@@ -0,0 +1,417 @@
+import os
+import math
+import numbers
+import numpy as np
+import gurobipy as gb
+
+# The KCommonFlowDecomp* classes build against the subset of gurobipy's Model interface below (addVar,
+# addConstr, setObjective, chgCoeff, setParam, optimize, .X / .Start / .Obj on variables, status codes).
+# "gurobi" is gurobipy itself; "highs" is a small pure-python model with that interface that is handed to
+# HiGHS (highspy) in one piece on every optimize() and reports gurobi's status codes.
+BACKENDS = ("gurobi", "highs")
+# parameters every new model starts with, e.g. the Threads share of a batch worker process
+DEFAULT_PARAMS = {}
+# the gurobi environment every model of this process is built in (see environment()), the process that
+# started it, and whether this module owns it or a caller passed it to set_environment
+_environment = None
+_environment_pid = None
+_environment_owned = False
+
+
+def check_backend(backend: str, builder: str = "python", linearization: str = "mccormick"):
+    if backend not in BACKENDS:
+        print("uh oh")
+        raise ValueError(f"Unknown backend {backend}. Use one of {', '.join(BACKENDS)}.")
+    if backend != "gurobi" and builder == "matrix":
+        print("uh oh")
+        raise ValueError("The matrix builder needs the gurobi backend.")
+    if backend != "gurobi" and linearization == "indicator":
+        print("uh oh")
+        raise ValueError("Indicator linearization needs the gurobi backend.")
+
+
+def environment():
+    # the shared gurobi environment, started on first use instead of once per model. A forked process (a
+    # parallel k-search or batch worker) never builds in its parent's environment, which gurobi does not
+    # allow, and starts its own the first time it needs one.
+    global _environment, _environment_pid, _environment_owned
+    if _environment is None or _environment_pid != os.getpid():
+        _environment = gb.Env()
+        _environment_pid = os.getpid()
+        _environment_owned = True
+    return _environment
+
+
+def set_environment(env):
+    # builds every later model of this process in env, a started gb.Env (e.g. with license or logging
+    # parameters set) that the caller keeps and disposes itself
+    global _environment, _environment_pid, _environment_owned
+    dispose_environment()
+    _environment, _environment_pid, _environment_owned = env, os.getpid(), False
+
+
+def dispose_environment():
+    # releases the shared environment (and its license) if this process started it; models still open in it
+    # must be disposed first. The next model starts a new one.
+    global _environment, _environment_pid, _environment_owned
+    if _environment is not None and _environment_owned and _environment_pid == os.getpid():
+        _environment.dispose()
+    _environment, _environment_pid, _environment_owned = None, None, False
+
+
+def new_model(backend: str = "gurobi"):
+    check_backend(backend)
+    model = gb.Model(env=environment()) if backend == "gurobi" else HighsModel()
+    for name, value in DEFAULT_PARAMS.items():
+        model.setParam(name, value)
+    return model
+
+
+def same_objective(a: float, b: float):
+    # objective values differ by floating point noise between solves (HiGHS does not round them), so the
+    # k loops compare them with the same tolerance the warm start's Cutoff allows
+    return a == b or math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+
+
+def attr(model, name: str, default=None):
+    # a model attribute, or default for whatever the backend does not report or the last solve did not
+    # produce (gurobi raises for e.g. ObjVal without an incumbent)
+    try:
+        value = getattr(model, name)
+    except (AttributeError, gb.GurobiError):
+        return default
+    return value.item() if hasattr(value, "item") else value
+
+
+class Incumbent:
+    # a solution met during optimize(): values(variables) reads it like getAttr("X", variables)
+    def __init__(self, values, objective: float, bound: float):
+        self.values = values
+        self.objective = objective
+        self.bound = bound
+
+
+def optimize(model, on_incumbent=None):
+    # model.optimize(), calling on_incumbent(Incumbent) with every improving solution gurobi finds; HiGHS
+    # runs without callbacks, so there it is called once with the final solution
+    if on_incumbent is None:
+        model.optimize()
+    elif isinstance(model, gb.Model):
+        def callback(model, where):
+            if where == gb.GRB.Callback.MIPSOL:
+                on_incumbent(Incumbent(model.cbGetSolution, model.cbGet(gb.GRB.Callback.MIPSOL_OBJ), model.cbGet(gb.GRB.Callback.MIPSOL_OBJBND)))
+        model.optimize(callback)
+    else:
+        model.optimize()
+        if model.SolCount > 0:
+            on_incumbent(Incumbent(lambda variables: model.getAttr("X", variables), model.ObjVal, model.ObjBound))
+
+
+def keep_solution(model):
+    # before changing a solved model: its solution becomes the start of the next solve, which gurobi
+    # already does by itself
+    if isinstance(model, HighsModel) and model.solution is not None:
+        model.starts = dict(enumerate(model.solution))
+
+
+def quicksum(terms):
+    terms = list(terms)
+    if any(isinstance(term, (Var, LinExpr)) for term in terms):
+        expr = LinExpr()
+        for term in terms:
+            expr._add(term, 1.0)
+        return expr
+    return gb.quicksum(terms)
+
+
+class LinExpr:
+    __slots__ = ("coeffs", "constant")
+
+    def __init__(self, coeffs: dict = None, constant: float = 0.0):
+        self.coeffs = coeffs if coeffs is not None else {}
+        self.constant = constant
+
+    def _add(self, other, scale: float):
+        # in place self += scale * other
+        if isinstance(other, Var):
+            self.coeffs[other] = self.coeffs.get(other, 0.0) + scale
+        elif isinstance(other, LinExpr):
+            for var, coeff in other.coeffs.items():
+                self.coeffs[var] = self.coeffs.get(var, 0.0) + scale * coeff
+            self.constant += scale * other.constant
+        elif isinstance(other, numbers.Number):
+            self.constant += scale * other
+        else:
+            return NotImplemented
+        return self
+
+    def copy(self):
+        return LinExpr(dict(self.coeffs), self.constant)
+
+    def __add__(self, other):
+        return self.copy()._add(other, 1.0)
+
+    def __radd__(self, other):
+        return self.copy()._add(other, 1.0)
+
+    def __sub__(self, other):
+        return self.copy()._add(other, -1.0)
+
+    def __rsub__(self, other):
+        return LinExpr()._add(other, 1.0)._add(self, -1.0)
+
+    def __mul__(self, other):
+        if not isinstance(other, numbers.Number):
+            return NotImplemented
+        return LinExpr({var: coeff * other for var, coeff in self.coeffs.items()}, self.constant * other)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1
+
+    def __le__(self, other):
+        return TempConstr(self - other, "<")
+
+    def __ge__(self, other):
+        return TempConstr(self - other, ">")
+
+    def __eq__(self, other):
+        return TempConstr(self - other, "=")
+
+    __hash__ = None
+
+
+class Var:
+    __slots__ = ("model", "index")
+
+    def __init__(self, model, index: int):
+        self.model = model
+        self.index = index
+
+    def _expr(self):
+        return LinExpr({self: 1.0})
+
+    def __add__(self, other):
+        return self._expr()._add(other, 1.0)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._expr()._add(other, -1.0)
+
+    def __rsub__(self, other):
+        return LinExpr()._add(other, 1.0)._add(self, -1.0)
+
+    def __mul__(self, other):
+        if not isinstance(other, numbers.Number):
+            return NotImplemented
+        return LinExpr({self: float(other)})
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return LinExpr({self: -1.0})
+
+    def __le__(self, other):
+        return TempConstr(self - other, "<")
+
+    def __ge__(self, other):
+        return TempConstr(self - other, ">")
+
+    def __eq__(self, other):
+        return TempConstr(self - other, "=")
+
+    __hash__ = object.__hash__
+
+    @property
+    def X(self):
+        return self.model.getAttr("X", [self])[0]
+
+    @property
+    def Start(self):
+        return self.model.starts.get(self.index)
+
+    @Start.setter
+    def Start(self, value):
+        self.model.starts[self.index] = float(value)
+
+    @property
+    def LB(self):
+        return self.model.lb[self.index]
+
+    @LB.setter
+    def LB(self, value):
+        self.model.lb[self.index] = float(value)
+        self.model._reset()
+
+    @property
+    def UB(self):
+        return self.model.ub[self.index]
+
+    @UB.setter
+    def UB(self, value):
+        self.model.ub[self.index] = float(value)
+        self.model._reset()
+
+    @property
+    def Obj(self):
+        return self.model.obj[self.index]
+
+    @Obj.setter
+    def Obj(self, value):
+        self.model.obj[self.index] = float(value)
+        self.model._reset()
+
+
+class TempConstr:
+    __slots__ = ("expr", "sense")
+
+    def __init__(self, expr: LinExpr, sense: str):
+        self.expr = expr
+        self.sense = sense
+
+
+class Constr:
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+class HighsModel:
+    # gurobi status codes for the HiGHS model statuses the drivers care about
+    STATUS = {"kOptimal": gb.GRB.OPTIMAL, "kInfeasible": gb.GRB.INFEASIBLE, "kUnboundedOrInfeasible": gb.GRB.INF_OR_UNBD,
+              "kUnbounded": gb.GRB.UNBOUNDED, "kObjectiveBound": gb.GRB.CUTOFF, "kTimeLimit": gb.GRB.TIME_LIMIT,
+              "kIterationLimit": gb.GRB.ITERATION_LIMIT, "kSolutionLimit": gb.GRB.SOLUTION_LIMIT, "kInterrupt": gb.GRB.INTERRUPTED}
+    PARAMS = {"OutputFlag": ("output_flag", bool), "Threads": ("threads", int), "TimeLimit": ("time_limit", float),
+              "Cutoff": ("objective_bound", float), "MIPGap": ("mip_rel_gap", float), "Seed": ("random_seed", int)}
+
+    def __init__(self):
+        self.lb, self.ub, self.obj, self.vtype = [], [], [], []
+        self.rows, self.row_lower, self.row_upper = [], [], []
+        self.starts = {}
+        self.params = {"OutputFlag": 1}
+        self.objective_constant = 0.0
+        self.Runtime = 0.0
+        self._reset()
+
+    def _reset(self):
+        # like gurobi, any change to the model discards the last solve
+        self.solution = None
+        self.status = gb.GRB.LOADED
+        self.ObjVal = None
+        self.SolCount = 0
+        self.NodeCount = 0
+        self.MIPGap = float("inf")
+        self.ObjBound = None
+
+    @property
+    def NumVars(self):
+        return len(self.lb)
+
+    @property
+    def NumConstrs(self):
+        return len(self.rows)
+
+    @property
+    def NumNZs(self):
+        return sum(len(row) for row in self.rows)
+
+    NumGenConstrs = 0
+
+    def addVar(self, lb: float = 0.0, ub: float = float("inf"), obj: float = 0.0, vtype: str = gb.GRB.CONTINUOUS, name: str = ""):
+        self.lb.append(float(lb))
+        self.ub.append(1.0 if vtype == gb.GRB.BINARY and ub > 1 else float(ub))
+        self.obj.append(float(obj))
+        self.vtype.append(vtype)
+        self._reset()
+        return Var(self, len(self.lb) - 1)
+
+    def addConstr(self, constr: TempConstr, name: str = ""):
+        rhs = -constr.expr.constant
+        self.rows.append({var.index: coeff for var, coeff in constr.expr.coeffs.items() if coeff != 0})
+        self.row_lower.append(rhs if constr.sense in (">", "=") else -np.inf)
+        self.row_upper.append(rhs if constr.sense in ("<", "=") else np.inf)
+        self._reset()
+        return Constr(len(self.rows) - 1)
+
+    def chgCoeff(self, constr: Constr, var: Var, value: float):
+        if value == 0:
+            self.rows[constr.index].pop(var.index, None)
+        else:
+            self.rows[constr.index][var.index] = float(value)
+        self._reset()
+
+    def setObjective(self, expr, sense: int = gb.GRB.MINIMIZE):
+        if sense != gb.GRB.MINIMIZE:
+            print("uh oh")
+            raise ValueError("Only minimization is supported by the highs backend.")
+        expr = LinExpr()._add(expr, 1.0)
+        self.obj = [0.0] * len(self.lb)
+        for var, coeff in expr.coeffs.items():
+            self.obj[var.index] += coeff
+        self.objective_constant = expr.constant
+        self._reset()
+
+    def setParam(self, name: str, value):
+        self.params[name] = value
+        self._reset()
+
+    def update(self):
+        pass
+
+    def dispose(self):
+        # as gurobi's: drops the rows and the solution now rather than when the model is collected
+        self.__init__()
+
+    def getAttr(self, attr: str, variables: list):
+        if attr != "X":
+            print("uh oh")
+            raise ValueError(f"Attribute {attr} is not supported by the highs backend.")
+        if self.solution is None:
+            print("uh oh")
+            raise ValueError("Unable to retrieve attribute 'X'")
+        return [self.solution[var.index] for var in variables]
+
+    def optimize(self):
+        import highspy
+        highs = highspy.Highs()
+        for name, value in self.params.items():
+            if name in self.PARAMS:
+                option, cast = self.PARAMS[name]
+                highs.setOptionValue(option, cast(value))
+        num_vars = len(self.lb)
+        highs.addVars(num_vars, np.array(self.lb), np.array(self.ub))
+        columns = np.arange(num_vars, dtype=np.int32)
+        highs.changeColsCost(num_vars, columns, np.array(self.obj))
+        integrality = np.array([vtype != gb.GRB.CONTINUOUS for vtype in self.vtype], dtype=np.int32)
+        highs.changeColsIntegrality(num_vars, columns, integrality)
+        highs.changeObjectiveOffset(self.objective_constant)
+        if self.rows:
+            # the rows in CSR form
+            data = np.array([coeff for row in self.rows for coeff in row.values()], dtype=float)
+            indices = np.array([var for row in self.rows for var in row], dtype=np.int32)
+            indptr = np.cumsum([0] + [len(row) for row in self.rows]).astype(np.int32)
+            highs.addRows(len(self.rows), np.array(self.row_lower), np.array(self.row_upper), len(data), indptr, indices, data)
+        if self.starts:
+            start_columns = np.array(list(self.starts), dtype=np.int32)
+            highs.setSolution(len(start_columns), start_columns, np.array(list(self.starts.values())))
+        highs.run()
+
+        self.status = self._status(highs.getModelStatus())
+        info = highs.getInfo()
+        self.SolCount = 1 if info.primal_solution_status == 2 else 0
+        self.solution = list(highs.getSolution().col_value) if self.SolCount else None
+        self.ObjVal = info.objective_function_value if self.SolCount else None
+        self.NodeCount = info.mip_node_count
+        self.MIPGap = info.mip_gap
+        self.ObjBound = info.mip_dual_bound if self.SolCount else None
+        self.Runtime = highs.getRunTime()
+
+    def _status(self, model_status):
+        import highspy
+        for name, code in self.STATUS.items():
+            if model_status == getattr(highspy.HighsModelStatus, name):
+                return code
+        return gb.GRB.NUMERIC
@@ -0,0 +1,92 @@
+import os
+import time
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import backends
+import CommonFlowDecomp as CFD
+
+
+class BatchResult:
+    # outcome of one batch job: status is "ok" (value is what solve() returned), "error" or "timeout"
+    def __init__(self, index: int, status: str, value=None, error: str = None, seconds: float = 0.0):
+        self.index = index
+        self.status = status
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"BatchResult(index={self.index}, status={self.status!r}, seconds={self.seconds:.2f})"
+
+
+def _solve_job(driver_class, G, params: dict, threads: int, conn):
+    try:
+        backends.DEFAULT_PARAMS["Threads"] = threads
+        conn.send(("ok", driver_class(G, **params).solve(), None))
+    except Exception as e:
+        conn.send(("error", None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def solve_batch(jobs, driver_class=CFD.CommonFlowDecomp, workers: int = None, threads: int = None, timeout: float = None):
+    # Solves each (G, params) job as driver_class(G, **params).solve() in its own worker process and yields a
+    # BatchResult per job in completion order; result.index is the job's position in jobs. jobs is consumed
+    # lazily, at most `workers` at a time. The `threads` budget is split evenly between the workers and every
+    # model a worker builds gets its share as Threads, so the pool and the solver never oversubscribe the
+    # machine. A job still running `timeout` seconds after it started is killed; a job that raises or kills
+    # its worker only fails itself.
+    threads = threads or os.cpu_count()
+    workers = min(workers or os.cpu_count(), threads)
+    worker_threads = max(1, threads // workers)
+    ctx = mp.get_context()
+
+    jobs = enumerate(jobs)
+    running = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(running) < workers:
+                try:
+                    index, (G, params) = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_solve_job, args=(driver_class, G, params, worker_threads, child_conn), daemon=True)
+                process.start()
+                child_conn.close()
+                running[parent_conn] = (index, process, time.perf_counter())
+            if not running:
+                return
+
+            wait_timeout = None
+            if timeout is not None:
+                first_deadline = min(start for _, _, start in running.values()) + timeout
+                wait_timeout = max(0, first_deadline - time.perf_counter())
+            for conn in wait(list(running), wait_timeout):
+                index, process, start = running.pop(conn)
+                try:
+                    status, value, error = conn.recv()
+                except EOFError:
+                    process.join()
+                    status, value, error = "error", None, f"worker exited with code {process.exitcode} without a result"
+                process.join()
+                conn.close()
+                yield BatchResult(index, status, value, error, time.perf_counter() - start)
+
+            if timeout is not None:
+                now = time.perf_counter()
+                for conn in [conn for conn, (_, _, start) in running.items() if now - start >= timeout]:
+                    index, process, start = running.pop(conn)
+                    _cancel(process, conn)
+                    yield BatchResult(index, "timeout", None, f"no result after {timeout}s", now - start)
+    finally:
+        for conn, (_, process, _) in running.items():
+            _cancel(process, conn)
+
+
+def _cancel(process, conn):
+    process.terminate()
+    process.join()
+    conn.close()
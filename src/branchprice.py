@@ -0,0 +1,545 @@
+import time
+import math
+import networkx as nx
+import numpy as np
+import gurobipy as gb
+import backends
+import instrument
+import flowgraph
+import ksearch
+import result
+
+# Exact CommonFlowDecomp over path variables instead of the compact k-path model, for graphs on which the
+# compact model (|E| k m pi variables and their product rows, once per k) gets too large. The restricted
+# master is the LP over a pool of s-t paths P: a weight w_Pj >= 0 per flow j and a use y_P >= 0 with
+# w_Pj <= U_Pj y_P (U_Pj = min_{e in P} f_ej, the most flow j can put on P, so no y_P needs to exceed 1 and
+# none gets an upper bound whose dual the pricing would have to know of), one row
+# sum_{P through e} w_Pj = f_ej per edge and flow, and the objective sum_P y_P. With alpha_ej the duals of
+# those rows and alpha_Pj their sum along P, a path not in the pool improves the LP iff
+# sum_j U_Pj max(0, alpha_Pj) > 1.
+#
+# Pricing first takes longest paths over the DAG for many edge costs at once: b alpha_ej over the edges with
+# f_ej >= b, for the bottlenecks b of each flow (exact for a single flow with few distinct values), and
+# sum_j U_j alpha_ej with U_j the largest flow of column j, for all flows and for the flows the paths found
+# are positive on. When that finds nothing, an upper bound on every path's value from the same longest
+# paths, or else a one-path MIP (the compact model with k = 1), proves that nothing improves.
+#
+# Branch-and-price branches on a fractional number n_e = sum_{P through e} y_P of paths in use through an
+# edge, by a row n_e <= floor or n_e >= ceil whose dual beta_e every path through e gains in the pricing, and
+# once every n_e is integral, on a fractional y_P, y_P = 1 first; y_P = 0 forbids P, and the pricing skips
+# every path a node fixes. A node whose paths cannot carry the flows (or meet its rows) at all is first priced with artificial
+# slacks on those rows as the only cost (phase one), which proves it infeasible if they cannot reach 0.
+# Only the exact variant fits: its weights are continuous, and there are no subpath constraints to carry.
+
+ENGINES = ("compact", "branch_price")
+TOLERANCE = 1e-6
+# bottleneck values per flow the pricing tries (quantiles of the flow's values if it has more)
+PRICING_BOTTLENECKS = 32
+# how many rounds the pricing takes the flows that the paths it found are positive on as new sets
+PRICING_ROUNDS = 3
+# seconds at most for the MIP over the root's paths that looks for an early incumbent
+HEURISTIC_SECONDS = 1.0
+
+
+def check_engine(engine: str, backend: str = "gurobi", subpath_constr: list = []):
+    if engine not in ENGINES:
+        print("uh oh")
+        raise ValueError(f"Unknown engine {engine}. Use one of {', '.join(ENGINES)}.")
+    if engine == "branch_price" and backend != "gurobi":
+        print("uh oh")
+        raise ValueError("The branch_price engine needs the gurobi backend.")
+    if engine == "branch_price" and subpath_constr:
+        print("uh oh")
+        raise ValueError("The branch_price engine does not support subpath constraints.")
+
+
+class PathPricer:
+    # Longest s-t paths of the DAG for many edge costs at once. Nodes are grouped by level (the most edges on
+    # any path from the source to them, taken along the cached topological order), and every edge into a
+    # level leaves a lower one, so each level is relaxed with one vectorized step.
+    def __init__(self, flow_graph: flowgraph.FlowGraph):
+        self.flow_graph = flow_graph
+        level = np.zeros(flow_graph.num_nodes, dtype=np.int64)
+        for n in flow_graph.topological_order:
+            edges = flow_graph.in_edges[flow_graph.in_ptr[n]:flow_graph.in_ptr[n + 1]]
+            if len(edges) > 0:
+                level[n] = level[flow_graph.tails[edges]].max() + 1
+        head_level = level[flow_graph.heads]
+        order = np.lexsort((flow_graph.heads, head_level))
+        ends = np.searchsorted(head_level[order], np.arange(1, level.max() + 2))
+        # per level: its edges (by head), their tails, the heads once each and where each head's edges start
+        self.levels = []
+        for start, end in zip(ends[:-1], ends[1:]):
+            edges = order[start:end]
+            heads = flow_graph.heads[edges]
+            starts = np.flatnonzero(np.r_[True, heads[1:] != heads[:-1]])
+            self.levels.append((edges, flow_graph.tails[edges], heads[starts], starts))
+        # the bottleneck columns: flow j and value b with, per edge, whether f_ej >= b. For the bound, the
+        # bottlenecks U_Pj split into buckets [b_t, b_t+1), b_0 = 0, each with the largest U_Pj it can hold:
+        # b_t itself if b runs over all values of the flow, b_t+1 otherwise.
+        self.flows = flow_graph.flows.astype(float)
+        self.bottleneck_flows, self.bottlenecks, self.bound_flows, self.bound_bottlenecks, self.bound_multipliers = [], [], [], [], []
+        for j in range(flow_graph.num_flows):
+            values = np.unique(self.flows[:, j][self.flows[:, j] > 0])
+            complete = len(values) <= PRICING_BOTTLENECKS
+            if not complete:
+                values = values[np.linspace(0, len(values) - 1, PRICING_BOTTLENECKS).round().astype(np.int64)]
+            self.bottleneck_flows.extend([j] * len(values))
+            self.bottlenecks.extend(values)
+            buckets = np.r_[0.0, values]
+            self.bound_flows.extend([j] * len(buckets))
+            self.bound_bottlenecks.extend(buckets)
+            self.bound_multipliers.extend(buckets if complete else np.r_[buckets[1:], buckets[-1:]])
+        self.bottleneck_flows, self.bottlenecks = np.array(self.bottleneck_flows, dtype=np.int64), np.array(self.bottlenecks)
+        self.bottleneck_edges = self.flows[:, self.bottleneck_flows] >= self.bottlenecks
+        self.bound_flows, self.bound_multipliers = np.array(self.bound_flows, dtype=np.int64), np.array(self.bound_multipliers)
+        self.bound_edges = self.flows[:, self.bound_flows] >= np.array(self.bound_bottlenecks)
+
+    def bottleneck_costs(self, duals):
+        # (|E| x s) costs b alpha_ej on the edges with f_ej >= b, -inf elsewhere, for every bottleneck column
+        return np.where(self.bottleneck_edges, duals[:, self.bottleneck_flows] * self.bottlenecks, -np.inf)
+
+    def value_bound(self, duals, count_duals):
+        # an upper bound on path_value over all s-t paths: per flow and bucket, the largest
+        # max(0, U alpha_Pj) + beta_P / m any path of the bucket can reach, summed over the flows of their
+        # largest bucket
+        share = count_duals[:, None] / self.flow_graph.num_flows
+        costs = np.hstack([np.where(self.bound_edges, duals[:, self.bound_flows] * self.bound_multipliers + share, -np.inf),
+                           np.where(self.bound_edges, share, -np.inf)])
+        reach = self.longest(costs)[self.flow_graph.sink]
+        reach = np.maximum(reach[:len(self.bound_flows)], reach[len(self.bound_flows):])
+        best = np.full(self.flow_graph.num_flows, -np.inf)
+        np.maximum.at(best, self.bound_flows, reach)
+        return float(best.sum())
+
+    def longest(self, costs):
+        # (|V| x s) longest distances from the source under each of the s columns of the (|E| x s) costs
+        dist = np.full((self.flow_graph.num_nodes, costs.shape[1]), -np.inf)
+        dist[self.flow_graph.source] = 0
+        for edges, tails, heads, starts in self.levels:
+            dist[heads] = np.maximum.reduceat(dist[tails] + costs[edges], starts, axis=0)
+        return dist
+
+    def path(self, dist, costs, column: int):
+        # the edges of a longest path under costs[:, column], walked back from the sink; None if no path has a
+        # finite cost
+        flow_graph = self.flow_graph
+        if dist[flow_graph.sink, column] == -np.inf:
+            return None
+        node, edges = flow_graph.sink, []
+        while node != flow_graph.source:
+            incoming = flow_graph.in_edges[flow_graph.in_ptr[node]:flow_graph.in_ptr[node + 1]]
+            e = int(incoming[np.argmax(dist[flow_graph.tails[incoming], column] + costs[incoming, column])])
+            edges.append(e)
+            node = flow_graph.tails[e]
+        return tuple(reversed(edges))
+
+
+def path_value(duals, count_duals, flows, path: tuple):
+    # sum_j U_Pj max(0, alpha_Pj) + sum_{e in P} beta_e: a path improves the master iff this exceeds its cost in y
+    path = list(path)
+    return float((flows[path].min(axis=0) * np.maximum(duals[path].sum(axis=0), 0)).sum() + count_duals[path].sum())
+
+
+class PricingModel:
+    # max sum_ej alpha_ej q_ej over s-t paths, with q_ej = u_j x_e as in the compact model's pi: x_e picks the
+    # path's edges and u_j <= U_Pj its weight in flow j, which the objective sets to U_Pj where alpha_Pj > 0
+    # and to 0 elsewhere; plus sum_e beta_e x_e. Built once; every call only sets the objective. Skipped paths
+    # are cut off by no-good rows, which stay in the model and are switched off when no longer skipped.
+    def __init__(self, flow_graph: flowgraph.FlowGraph):
+        self.flow_graph = flow_graph
+        flows = flow_graph.flows.astype(float)
+        w_ub = flows.max(axis=0)
+        self.model = backends.new_model("gurobi")
+        self.model.setParam("OutputFlag", 0)
+        self.edge_vars = self.model.addMVar(flow_graph.num_edges, vtype=gb.GRB.BINARY)
+        self.path_vars = self.model.addMVar(flow_graph.num_flows, ub=w_ub)
+        self.pi_vars = self.model.addMVar(flows.shape, ub=flows)
+        ends = np.zeros(flow_graph.num_nodes)
+        ends[flow_graph.source], ends[flow_graph.sink] = -1, 1
+        self.model.addMConstr(flow_graph.incidence(), self.edge_vars, "=", ends)
+        edges = self.edge_vars[:, None]
+        self.model.addConstr(self.pi_vars <= flows * edges)
+        self.model.addConstr(self.pi_vars <= self.path_vars[None, :])
+        self.model.addConstr(self.pi_vars >= self.path_vars[None, :] - w_ub * (1 - edges))
+        self.no_good_constrs = {}
+        # the position of each edge's tail in the topological order, to put a solution's edges in path order
+        position = np.empty(flow_graph.num_nodes, dtype=np.int64)
+        position[flow_graph.topological_order] = np.arange(flow_graph.num_nodes)
+        self.tail_position = position[flow_graph.tails]
+
+    def price(self, duals, count_duals, threshold: float, skipped: set, time_limit: float = None):
+        # (paths worth more than threshold, a bound on the value of any path that is not skipped)
+        self.model.setObjective((duals * self.pi_vars).sum() + count_duals @ self.edge_vars, gb.GRB.MAXIMIZE)
+        for path in skipped:
+            if path not in self.no_good_constrs:
+                self.no_good_constrs[path] = self.model.addConstr(self.edge_vars[list(path)].sum() <= len(path) - 1)
+        for path, constr in self.no_good_constrs.items():
+            constr.RHS = len(path) - 1 if path in skipped else len(path)
+        self.model.setParam("Cutoff", threshold + TOLERANCE)
+        self.model.setParam("TimeLimit", time_limit if time_limit is not None else gb.GRB.INFINITY)
+        self.model.optimize()
+        if self.model.status in (gb.GRB.CUTOFF, gb.GRB.INFEASIBLE, gb.GRB.INF_OR_UNBD):
+            return [], threshold
+        paths = []
+        for n in range(self.model.SolCount):
+            self.model.setParam("SolutionNumber", n)
+            if self.model.PoolObjVal <= threshold + TOLERANCE:
+                continue
+            edges = np.flatnonzero(np.asarray(self.edge_vars.Xn) > 0.5)
+            path = tuple(int(e) for e in edges[np.argsort(self.tail_position[edges])])
+            if path not in paths and path not in skipped:
+                paths.append(path)
+        bound = self.model.ObjBound if self.model.status == gb.GRB.OPTIMAL or self.model.SolCount > 0 else float("inf")
+        return paths, bound
+
+    def dispose(self):
+        self.model.dispose()
+
+
+class RestrictedMaster:
+    # The master LP over the paths found so far (see the top of this module), with the n_e rows of the
+    # current node. The artificial slacks on the rows are fixed at 0 except in phase one, where they are the
+    # whole objective.
+    def __init__(self, flow_graph: flowgraph.FlowGraph):
+        import scipy.sparse as sp
+        self.flow_graph = flow_graph
+        self.num_flows = flow_graph.num_flows
+        self.flows = flow_graph.flows.astype(float)
+        self.model = backends.new_model("gurobi")
+        self.model.setParam("OutputFlag", 0)
+        size = self.flows.size
+        self.artificial_vars = self.model.addMVar(2 * size, ub=0.0)
+        identity = sp.identity(size, format="csr")
+        # row e * m + j is edge e of flow j
+        self.flow_constrs = self.model.addMConstr(sp.hstack([identity, -identity], format="csr"), self.artificial_vars, "=",
+                                                  self.flows.ravel()).tolist()
+        self.paths = []
+        self.path_ids = {}
+        self.used_vars = []
+        self.path_vars = []
+        self.phase_one = False
+        # edge -> its n_e rows of the current node, and the artificial slack of each
+        self.count_constrs = {}
+        self.count_artificial_vars = []
+
+    def add_path(self, path: tuple):
+        self.path_ids[path] = len(self.paths)
+        self.paths.append(path)
+        rows = [constr for e in path for constr in self.count_constrs.get(e, [])]
+        used = self.model.addVar(obj=0.0 if self.phase_one else 1.0, column=gb.Column([1.0] * len(rows), rows))
+        bottleneck = self.flows[list(path)].min(axis=0)
+        weights = []
+        for j in range(self.num_flows):
+            rows = [self.flow_constrs[e * self.num_flows + j] for e in path]
+            weight = self.model.addVar(column=gb.Column([1.0] * len(rows), rows))
+            self.model.addConstr(weight <= float(bottleneck[j]) * used)
+            weights.append(weight)
+        self.used_vars.append(used)
+        self.path_vars.extend(weights)
+
+    def set_phase_one(self, phase_one: bool):
+        self.phase_one = phase_one
+        self.artificial_vars.UB = np.full(self.artificial_vars.shape, np.inf if phase_one else 0.0)
+        self.artificial_vars.Obj = np.full(self.artificial_vars.shape, 1.0 if phase_one else 0.0)
+        if self.used_vars:
+            self.model.setAttr("Obj", self.used_vars, [0.0 if phase_one else 1.0] * len(self.used_vars))
+        for slack in self.count_artificial_vars:
+            slack.UB, slack.Obj = (np.inf, 1.0) if phase_one else (0.0, 0.0)
+
+    def fix(self, fixings: dict):
+        # y_P bounds of a node: fixings maps path indexes to 0 or 1, every other y_P is free
+        if self.used_vars:
+            self.model.setAttr("LB", self.used_vars, [1.0 if fixings.get(i) == 1 else 0.0 for i in range(len(self.paths))])
+            self.model.setAttr("UB", self.used_vars, [float(fixings[i]) if i in fixings else np.inf for i in range(len(self.paths))])
+
+    def bound_counts(self, counts: dict):
+        # the n_e rows of a node: counts maps edges to (lower, upper) bounds, None for no upper bound
+        for constrs in self.count_constrs.values():
+            for constr in constrs:
+                self.model.remove(constr)
+        self.model.remove(self.count_artificial_vars)
+        self.count_constrs, self.count_artificial_vars = {}, []
+        for e, (lower, upper) in counts.items():
+            used = [self.used_vars[i] for i, path in enumerate(self.paths) if e in path]
+            self.count_constrs[e] = []
+            if lower > 0:
+                slack = self.model.addVar(ub=np.inf if self.phase_one else 0.0, obj=1.0 if self.phase_one else 0.0)
+                self.count_constrs[e].append(self.model.addConstr(gb.LinExpr([1.0] * len(used), used) + slack >= lower))
+                self.count_artificial_vars.append(slack)
+            if upper is not None:
+                slack = self.model.addVar(ub=np.inf if self.phase_one else 0.0, obj=1.0 if self.phase_one else 0.0)
+                self.count_constrs[e].append(self.model.addConstr(gb.LinExpr([1.0] * len(used), used) - slack <= upper))
+                self.count_artificial_vars.append(slack)
+
+    def counts(self, used):
+        # n_e of every edge for the y_P in used
+        counts = np.zeros(self.flow_graph.num_edges)
+        for path, value in zip(self.paths, used):
+            counts[list(path)] += value
+        return counts
+
+    def count_duals(self):
+        # (|E|,) summed duals of the n_e rows, 0 on the edges without any
+        duals = np.zeros(self.flow_graph.num_edges)
+        for e, constrs in self.count_constrs.items():
+            duals[e] = sum(self.model.getAttr("Pi", constrs))
+        return duals
+
+    def duals(self):
+        # (|E| x m) duals of the flow rows
+        return np.array(self.model.getAttr("Pi", self.flow_constrs)).reshape(-1, self.num_flows)
+
+    def used(self):
+        return np.array(self.model.getAttr("X", self.used_vars)) if self.used_vars else np.zeros(0)
+
+    def weights(self):
+        values = self.model.getAttr("X", self.path_vars) if self.path_vars else []
+        return np.array(values).reshape(len(self.paths), self.num_flows)
+
+    def dispose(self):
+        self.model.dispose()
+
+
+class BranchAndPrice:
+    def __init__(self, G: nx.DiGraph, num_flows: int, flow_attr: str = "flow", subpath_constr: list = [], flow_graph: flowgraph.FlowGraph = None, hook=None):
+        started = time.perf_counter()
+        self.flow_graph = flow_graph if flow_graph is not None else flowgraph.FlowGraph(G, num_flows, flow_attr)
+        self.flow_graph.validate(conserving=True)
+        check_engine("branch_price", subpath_constr=subpath_constr)
+        self.stats = instrument.ModelStats(hook, started)
+        self.stats.lap("validate")
+        self.G = G
+        self.num_flows = num_flows
+        self.k = None
+        self.pricer = PathPricer(self.flow_graph)
+        self.master = RestrictedMaster(self.flow_graph)
+        self.pricing_model = None
+        self.deadline = None
+        self.nodes = 0
+        self.stats.lap("init")
+
+    def solve(self, k_min: int, k_max: int, start: tuple = None, budget: ksearch.Budget = None, callback=None):
+        # DecompResult of the fewest paths in k_min..k_max, or None if there is none (or none was found in
+        # time). start is an optional (paths, weights) decomposition, e.g. the driver's greedy one; callback
+        # gets every improving decomposition as a DecompResult with status INPROGRESS.
+        started = time.perf_counter()
+        budget = budget if budget is not None else ksearch.Budget()
+        params = budget.params()
+        self.deadline = time.perf_counter() + params["TimeLimit"] if "TimeLimit" in params else None
+        mip_gap = params.get("MIPGap", 0.0)
+        incumbent, best = k_max + 1, None
+        if start is not None:
+            paths = [tuple(self.flow_graph.edge_ids[edge] for edge in zip(path[:-1], path[1:])) for path in start[0]]
+            for path in paths:
+                if path not in self.master.path_ids:
+                    self.master.add_path(path)
+            if len(paths) <= k_max:
+                incumbent, best = len(paths), (paths, np.asarray(start[1], dtype=float))
+
+        # depth first over (bound of the parent, y fixings, n_e bounds); a node is dropped once its bound
+        # reaches the incumbent
+        stack = [(k_min, {}, {})]
+        status = None
+        while stack:
+            if self.expired():
+                status = gb.GRB.TIME_LIMIT
+                break
+            open_bound = min(node[0] for node in stack)
+            if best is not None and incumbent - open_bound <= mip_gap * incumbent:
+                status = gb.GRB.OPTIMAL
+                break
+            parent_bound, fixings, counts = stack.pop()
+            if parent_bound >= incumbent:
+                continue
+            self.nodes += 1
+            relaxed = self.relax(fixings, counts)
+            if relaxed is None:
+                if self.expired():
+                    stack.append((parent_bound, fixings, counts))
+                continue
+            node_bound = max(parent_bound, math.ceil(relaxed - TOLERANCE))
+            if node_bound >= incumbent:
+                continue
+            used = self.master.used()
+            if (np.abs(used - np.round(used)) <= TOLERANCE).all():
+                paths, weights = self.decomposition(used > 0.5, self.master.weights())
+                if len(paths) < incumbent:
+                    incumbent, best = len(paths), (paths, weights)
+                    self.report(best, gb.GRB.INPROGRESS, callback)
+                continue
+            if self.nodes == 1:
+                found = self.restricted_mip(incumbent)
+                if found is not None and len(found[0]) < incumbent:
+                    incumbent, best = len(found[0]), found
+                    self.report(best, gb.GRB.INPROGRESS, callback)
+                    if node_bound >= incumbent:
+                        continue
+            stack.extend(self.branch(node_bound, fixings, counts, used))
+        if status is None:
+            status = gb.GRB.OPTIMAL if best is not None else gb.GRB.INFEASIBLE
+        bound = min([node[0] for node in stack] + [incumbent])
+        self.record(incumbent if best is not None else k_max, status, bound, time.perf_counter() - started)
+        if best is None:
+            return None
+        return self.report(best, status)
+
+    def branch(self, bound: int, fixings: dict, counts: dict, used):
+        # the two children of a node with fractional y, the one to take first last
+        n = self.master.counts(used)
+        distance = np.abs(n - np.round(n))
+        if (distance > TOLERANCE).any():
+            e = int(np.argmax(distance))
+            lower, upper = counts.get(e, (0, None))
+            down = (bound, fixings, {**counts, e: (lower, math.floor(n[e]))})
+            up = (bound, fixings, {**counts, e: (math.ceil(n[e]), upper)})
+            # toward the nearer integer first
+            return [up, down] if n[e] - math.floor(n[e]) < 0.5 else [down, up]
+        # the y closest to 1, set first: the dive that reaches an integral node soonest
+        fractional = np.flatnonzero(np.abs(used - np.round(used)) > TOLERANCE)
+        i = int(fractional[np.argmax(used[fractional])])
+        return [(bound, {**fixings, i: 0}, counts), (bound, {**fixings, i: 1}, counts)]
+
+    def relax(self, fixings: dict, counts: dict):
+        # the node's LP bound on the number of paths, by column generation; None if no decomposition obeys the
+        # fixings and counts or the time ran out
+        self.master.fix(fixings)
+        self.master.bound_counts(counts)
+        # the paths the pricing passes over: forbidden ones, and the ones set to 1, whose value may exceed their
+        # cost at an optimum
+        skipped = {self.master.paths[i] for i in fixings}
+        if not self.optimize_master():
+            if self.expired():
+                return None
+            self.master.set_phase_one(True)
+            shortfall, bound = self.generate_columns(0.0, skipped)
+            self.master.set_phase_one(False)
+            if shortfall is None or shortfall > TOLERANCE:
+                return None
+        value, bound = self.generate_columns(1.0, skipped)
+        if value is None:
+            return None
+        # Farley's bound, every path costing 1, while some path not in the pool may still improve the LP
+        return value / max(1.0, bound)
+
+    def generate_columns(self, threshold: float, skipped: set):
+        # (LP value, bound on the value of any path left out) once pricing finds no path worth more than
+        # threshold, a path's cost in the current phase; (None, None) if the time runs out or the LP is infeasible
+        while True:
+            if self.expired() or not self.optimize_master():
+                return None, None
+            paths, bound = self.price(self.master.duals(), self.master.count_duals(), threshold, skipped)
+            if not paths:
+                return self.master.model.ObjVal, bound
+            for path in paths:
+                self.master.add_path(path)
+
+    def price(self, duals, count_duals, threshold: float, skipped: set):
+        # (new paths worth more than threshold, a bound on the value of every path not in the pool)
+        start = time.perf_counter()
+        try:
+            flows = self.pricer.flows
+            weighted_duals = duals * flows.max(axis=0)
+            costs = self.pricer.bottleneck_costs(duals) + count_duals[:, None]
+            subsets, tried, found = [np.ones(self.num_flows, dtype=bool)], set(), {}
+            for _ in range(PRICING_ROUNDS):
+                subsets = [subset for subset in subsets if subset.tobytes() not in tried]
+                tried.update(subset.tobytes() for subset in subsets)
+                if subsets:
+                    costs = np.hstack([costs, weighted_duals @ np.array(subsets, dtype=float).T + count_duals[:, None]])
+                dist = self.pricer.longest(costs)
+                subsets = []
+                for column in range(costs.shape[1]):
+                    path = self.pricer.path(dist, costs, column)
+                    if path is None:
+                        continue
+                    support = duals[list(path)].sum(axis=0) > TOLERANCE
+                    if support.any():
+                        subsets.append(support)
+                    if path in self.master.path_ids or path in found:
+                        continue
+                    value = path_value(duals, count_duals, flows, path)
+                    if value > threshold + TOLERANCE:
+                        found[path] = value
+                if found or not subsets:
+                    break
+                costs = np.zeros((self.flow_graph.num_edges, 0))
+            if found:
+                return sorted(found, key=found.get, reverse=True), None
+            # nothing from the longest paths: proven by the bound if it can, by the exact pricing otherwise
+            bound = self.pricer.value_bound(duals, count_duals)
+            if bound <= threshold + TOLERANCE:
+                return [], bound
+            if self.pricing_model is None:
+                self.pricing_model = PricingModel(self.flow_graph)
+            paths, bound = self.pricing_model.price(duals, count_duals, threshold, skipped, self.remaining() if self.deadline is not None else None)
+            return [path for path in paths if path not in self.master.path_ids], bound
+        finally:
+            self.stats.add_time("pricing", time.perf_counter() - start)
+
+    def optimize_master(self):
+        # True if the master LP solved to optimality
+        start = time.perf_counter()
+        self.master.model.setParam("TimeLimit", self.remaining() if self.deadline is not None else gb.GRB.INFINITY)
+        self.master.model.optimize()
+        self.stats.add_time("master", time.perf_counter() - start)
+        return self.master.model.status == gb.GRB.OPTIMAL
+
+    def restricted_mip(self, cutoff: int):
+        # the paths at hand with integral y, for an early incumbent: (paths, weights) with fewer than cutoff
+        # paths, or None
+        start = time.perf_counter()
+        model = self.master.model
+        model.setAttr("VType", self.master.used_vars, [gb.GRB.BINARY] * len(self.master.used_vars))
+        model.setParam("Cutoff", cutoff - 0.5)
+        model.setParam("TimeLimit", min(HEURISTIC_SECONDS, self.remaining()))
+        model.optimize()
+        found = None
+        if model.SolCount > 0:
+            found = self.decomposition(self.master.used() > 0.5, self.master.weights())
+        model.setAttr("VType", self.master.used_vars, [gb.GRB.CONTINUOUS] * len(self.master.used_vars))
+        model.setParam("Cutoff", gb.GRB.INFINITY)
+        self.stats.add_time("heuristic", time.perf_counter() - start)
+        return found
+
+    def decomposition(self, used, weights):
+        # (edge-id paths, weights) of the paths in use that carry any weight; if no flow needs a path, one s-t
+        # path of weight 0, as the compact models never use fewer than k_min >= 1 paths
+        used = used & (weights > TOLERANCE).any(axis=1)
+        if not used.any():
+            costs = np.zeros((self.flow_graph.num_edges, 1))
+            return [self.pricer.path(self.pricer.longest(costs), costs, 0)], np.zeros((1, self.num_flows))
+        return [self.master.paths[i] for i in np.flatnonzero(used)], weights[used]
+
+    def report(self, found: tuple, status: int, callback=None):
+        # found as a DecompResult on the graph the driver was given; passed to callback if there is one
+        paths, weights = found
+        node_paths = [self.flow_graph.expand_path([self.flow_graph.nodes[self.flow_graph.tails[path[0]]]] +
+                                                  [self.flow_graph.nodes[self.flow_graph.heads[e]] for e in path]) for path in paths]
+        weights = self.flow_graph.expand_weights(np.asarray(weights).reshape(len(paths), self.num_flows))
+        decomposition = result.DecompResult(node_paths, weights, 0.0, len(paths), status, subpath_claims=[], bound=0.0)
+        if callback is not None:
+            callback(decomposition)
+        return decomposition
+
+    def record(self, k: int, status: int, bound: int, seconds: float):
+        # one record for the whole search, in the shape of the per-k records of the compact models
+        self.k = k
+        self.stats.add_time("solve", seconds)
+        record = dict(k=k, seconds=dict(self.stats.seconds), vars=self.master.model.NumVars, constrs=self.master.model.NumConstrs,
+                      nonzeros=self.master.model.NumNZs, nodes=self.nodes, columns=len(self.master.paths), status=status,
+                      objective=k if status != gb.GRB.INFEASIBLE else None, bound=bound)
+        self.stats.solves.append(record)
+        if self.stats.hook is not None:
+            self.stats.hook(record)
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.perf_counter()) if self.deadline is not None else float("inf")
+
+    def expired(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def dispose(self):
+        self.master.dispose()
+        if self.pricing_model is not None:
+            self.pricing_model.dispose()
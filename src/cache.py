@@ -0,0 +1,149 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import collections
+import numpy as np
+import gurobipy as gb
+import flowgraph
+
+# Opt-in cache of finished decompositions. A key is a sha256 over the graph's labelled edges and flows (in a
+# canonical edge order, so two graphs built in different insertion orders share it), the variant and every
+# parameter that changes its answer. Drivers store (answer, DecompResult) under the key of the whole solve,
+# and the search drivers also store the largest k proven infeasible under the key of the problem without
+# its k range, so that a re-run with a larger maximum_k starts above it. MemoryCache and DiskCache have the
+# same get / put interface and evict least recently used entries once their total size exceeds max_bytes.
+
+
+def problem_key(variant: str, flow_graph: flowgraph.FlowGraph, subpath_constr: list = [], **params) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{variant}\0{flow_graph.num_flows}\0{flow_graph.num_nodes}\0".encode())
+    order = sorted(range(flow_graph.num_edges), key=lambda e: (repr(flow_graph.edges[e][0]), repr(flow_graph.edges[e][1])))
+    for e in order:
+        digest.update(repr(flow_graph.edges[e]).encode())
+    flows = flow_graph.flows[order] if flow_graph.num_edges > 0 else flow_graph.flows
+    if flows.dtype == object:
+        digest.update(repr(flows.tolist()).encode())
+    else:
+        digest.update(str(flows.shape).encode())
+        digest.update(np.ascontiguousarray(flows, dtype=np.float64).tobytes())
+    digest.update(repr([list(subpath) for subpath in subpath_constr]).encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+def solve_key(problem: str, maximum_k: int) -> str:
+    return f"{problem}-k{maximum_k}"
+
+
+def known_infeasible(store, problem: str) -> int:
+    # every k up to the returned one is proven infeasible (0 if none is)
+    return store.get(f"{problem}-infeasible", 0)
+
+
+def store_verdicts(store, problem: str, records: list):
+    # feasibility is monotone in k, so the largest k that any model proved infeasible settles every smaller k;
+    # records are the per-solve records of instrument.RunStats, and a solve cut off by a limit proves nothing
+    infeasible = [record["k"] for record in records if record["status"] in (gb.GRB.INFEASIBLE, gb.GRB.INF_OR_UNBD)]
+    if infeasible and max(infeasible) > known_infeasible(store, problem):
+        store.put(f"{problem}-infeasible", max(infeasible))
+
+
+def cached_solve(driver, search, verdicts: bool = False):
+    # (answer, True if it came from driver.cache) for a driver's solve(): starts driver.budget, then either
+    # restores a stored answer and its driver.result or runs search(), which returns (answer, whether it is
+    # final). A final answer is stored only if no time or gap limit may have cut the run short; with verdicts,
+    # so is the largest k the run proved infeasible.
+    driver.budget.start()
+    driver.result = None
+    if driver.cache is None:
+        return search()[0], False
+    key = solve_key(driver.problem_key, driver.maximum_k)
+    cached = driver.cache.get(key)
+    if cached is not None:
+        answer, driver.result = cached
+        return answer, True
+    answer, final = search()
+    if verdicts:
+        store_verdicts(driver.cache, driver.problem_key, driver.stats.models)
+    if final and driver.budget.unlimited():
+        driver.cache.put(key, (answer, driver.result))
+    return answer, False
+
+
+class MemoryCache:
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = collections.OrderedDict()
+
+    def get(self, key: str, default=None):
+        if key not in self.entries:
+            return default
+        self.entries.move_to_end(key)
+        return pickle.loads(self.entries[key])
+
+    def put(self, key: str, value):
+        # values are kept pickled, so a caller mutating what it got back cannot change the cache
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DiskCache:
+    # One pickle file per key in directory; a file's mtime is its last use, which is what eviction goes by.
+    def __init__(self, directory: str, max_bytes: int = 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key: str, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        return value
+
+    def put(self, key: str, value):
+        # written to a temporary file and renamed, so concurrent readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".pkl"))
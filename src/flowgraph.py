@@ -0,0 +1,184 @@
+import numpy as np
+import networkx as nx
+
+# float flows that sum to within this of each other at a node count as conserved
+CONSERVATION_TOLERANCE = 1e-9
+
+
+class FlowGraph:
+    # Array-backed copy of a multi-flow st-DAG, built once per graph and shared by validation and the model
+    # builders. Nodes and edges get integer ids in G.nodes() / G.edges() order; flows is an (|E| x m) array,
+    # or (|E| x m x 2) for inexact (lower, upper) bounds.
+    def __init__(self, G: nx.DiGraph, num_flows: int, flow_attr: str = "flow"):
+        self.num_flows = num_flows
+        self.flow_attr = flow_attr
+        self.nodes = list(G.nodes())
+        self.node_ids = {v: n for n, v in enumerate(self.nodes)}
+        self.edges = list(G.edges())
+        self.edge_ids = {edge: e for e, edge in enumerate(self.edges)}
+        self.num_nodes = len(self.nodes)
+        self.num_edges = len(self.edges)
+        self.tails = np.fromiter((self.node_ids[u] for u, v in self.edges), dtype=np.int64, count=self.num_edges)
+        self.heads = np.fromiter((self.node_ids[v] for u, v in self.edges), dtype=np.int64, count=self.num_edges)
+
+        # CSR adjacency: out_edges[out_ptr[n]:out_ptr[n+1]] are the ids of the edges leaving node n
+        self.out_ptr, self.out_edges = self._csr(self.tails)
+        self.in_ptr, self.in_edges = self._csr(self.heads)
+        self.out_degree = np.diff(self.out_ptr)
+        self.in_degree = np.diff(self.in_ptr)
+
+        raw_flows = [data.get(flow_attr) for u, v, data in G.edges(data=True)]
+        self.has_flows = all(flows is not None and len(flows) == num_flows for flows in raw_flows)
+        self.flows = np.zeros((self.num_edges, num_flows))
+        if self.has_flows and self.num_edges > 0:
+            try:
+                self.flows = np.array(raw_flows)
+            except ValueError:
+                # ragged bounds; an object placeholder that every format check rejects
+                self.flows = np.full((self.num_edges, num_flows), None, dtype=object)
+        self.topological_order = self._topological_order()
+        # contracted edge -> the node list of the chain of the original graph it stands for; set by presolve.contract_chains
+        self.chains = {}
+        # original flow j -> (column of this graph, factor) when flows were merged; set by presolve.collapse_flows
+        self.flow_columns = None
+        self.flow_scales = None
+
+    def _csr(self, ends):
+        order = np.argsort(ends, kind="stable")
+        ptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=self.num_nodes), out=ptr[1:])
+        return ptr, order
+
+    def _topological_order(self):
+        # Kahn's algorithm over the CSR arrays; shorter than num_nodes if G has a cycle
+        in_degree = self.in_degree.copy()
+        order = list(np.flatnonzero(in_degree == 0))
+        position = 0
+        while position < len(order):
+            n = order[position]
+            position += 1
+            heads = self.heads[self.out_edges[self.out_ptr[n]:self.out_ptr[n + 1]]]
+            in_degree[heads] -= 1
+            order.extend(heads[in_degree[heads] == 0])
+        return np.array(order, dtype=np.int64)
+
+    def incidence(self):
+        # (|V| x |E|) node-edge incidence: +1 where the edge enters the node, -1 where it leaves
+        import scipy.sparse as sp
+        edge_ids = np.arange(self.num_edges)
+        return sp.csr_array((np.concatenate([np.ones(self.num_edges), -np.ones(self.num_edges)]),
+                             (np.concatenate([self.heads, self.tails]), np.concatenate([edge_ids, edge_ids]))),
+                            shape=(self.num_nodes, self.num_edges))
+
+    @property
+    def source(self):
+        return int(self.topological_order[0])
+
+    @property
+    def sink(self):
+        return int(self.topological_order[-1])
+
+    def is_dag(self) -> bool:
+        return len(self.topological_order) == self.num_nodes
+
+    def is_st_graph(self) -> bool:
+        if not self.is_dag():
+            return False
+        sources = self.in_degree == 0
+        sinks = (self.out_degree == 0) & ~sources
+        return sources.sum() == 1 and sinks.sum() == 1
+
+    def has_correct_num_flows(self) -> bool:
+        return self.has_flows
+
+    def has_valid_flow_format(self) -> bool:
+        return self.has_flows and self.flows.ndim == 2 and self.flows.dtype.kind in "biuf"
+
+    def conserves_flow(self) -> bool:
+        # exact for integer flows; float flows within CONSERVATION_TOLERANCE, with no slack relative to their size
+        internal = (self.in_degree > 0) & (self.out_degree > 0)
+        dtype = np.int64 if self.flows.dtype.kind in "biu" else float
+        in_flow = np.zeros((self.num_nodes, self.num_flows), dtype=dtype)
+        out_flow = np.zeros((self.num_nodes, self.num_flows), dtype=dtype)
+        np.add.at(in_flow, self.heads, self.flows)
+        np.add.at(out_flow, self.tails, self.flows)
+        if dtype is np.int64:
+            return bool((in_flow[internal] == out_flow[internal]).all())
+        return bool(np.isclose(in_flow[internal], out_flow[internal], rtol=0, atol=CONSERVATION_TOLERANCE).all())
+
+    def check_inexact_flows(self) -> bool:
+        if self.flows.ndim != 3 or self.flows.dtype.kind not in "biuf":
+            raise ValueError("Flow attributes must be bounds expressed as tuples")
+        if self.flows.shape[2] != 2:
+            raise ValueError("There must be a single upper and lower bound for each edge flow value")
+        if (self.flows[:, :, 0] > self.flows[:, :, 1]).any():
+            raise ValueError("Lower bound must be less than or equal to upper bound for each edge flow value")
+        return True
+
+    def validate(self, inexact: bool = False, conserving: bool = False):
+        # raises the ValueError the k-classes raise for an invalid input, for callers that read the graph before
+        # they build one (presolve and the k lower bound)
+        if not self.is_dag():
+            print("uh oh")
+            raise ValueError('Input graph is not a directed acyclic graph')
+        if not self.is_st_graph():
+            print("uh oh")
+            raise ValueError('Input graph is not an st graph')
+        if not self.has_correct_num_flows():
+            print("uh oh")
+            raise ValueError('Number of flows does not match')
+        if inexact:
+            self.check_inexact_flows()
+        elif not self.has_valid_flow_format():
+            print("uh oh")
+            raise ValueError('Flow value must be int or float')
+        if conserving and not self.conserves_flow():
+            print("uh oh")
+            raise ValueError('Input graph does not conserve flow')
+
+    def upper_flows(self):
+        # (|E| x m) flow values, or their upper bounds for inexact flows
+        return self.flows[:, :, 1] if self.flows.ndim == 3 else self.flows
+
+    def expand_path(self, path: list) -> list:
+        # a path of this graph as the path of the graph it was contracted from
+        if not self.chains:
+            return path
+        expanded = [path[0]]
+        for edge in zip(path[:-1], path[1:]):
+            expanded.extend(self.chains.get(edge, edge)[1:])
+        return expanded
+
+    def expand_weights(self, weights):
+        # (k x m) path weights of this graph's flows as weights of the flows of the graph it was reduced from
+        if self.flow_columns is None:
+            return weights
+        return np.asarray(weights)[:, self.flow_columns] * self.flow_scales
+
+    def max_flow(self):
+        # the largest flow value (the largest upper bound for inexact flows), as in utils.get_max_flow
+        if not self.has_flows:
+            print("uh oh")
+            raise ValueError(
+                "Some edges missing flows"
+            )
+        lower = self.flows[:, :, 0] if self.flows.ndim == 3 else self.flows
+        negative = np.flatnonzero((lower < 0).any(axis=1))
+        if len(negative) > 0:
+            u, v = self.edges[negative[0]]
+            print("uh oh")
+            raise ValueError(
+                f"Edge ({u},{v}) has negative flow value {self.flows[negative[0]].tolist()}. All flow values must be >=0."
+            )
+        return self.upper_flows().max().item() if self.num_edges > 0 else float("-inf")
+
+
+class EdgeFlows:
+    # read-only (u, v, j) -> flow view over a FlowGraph, standing in for the old per-entry dict
+    def __init__(self, flow_graph: FlowGraph):
+        self.flow_graph = flow_graph
+
+    def __getitem__(self, key):
+        u, v, j = key
+        value = self.flow_graph.flows[self.flow_graph.edge_ids[u, v], j]
+        return value.item() if np.ndim(value) == 0 else tuple(value.tolist())
@@ -0,0 +1,46 @@
+import random
+import networkx as nx
+
+# Seeded synthetic instances with a known answer: an st-DAG that is the union of k planted s-t paths, each
+# carrying a random integer weight per flow, so its flows have a k-path decomposition by construction. Nodes
+# are "0".."num_nodes-1" in topological order, with source "0" and sink str(num_nodes - 1).
+
+
+def planted_decomposition(num_nodes: int, k: int, num_flows: int, seed: int, max_weight: int = 20, max_inner_nodes: int = None,
+                          flow_attr: str = "flow"):
+    # returns (G, paths, weights): the graph and its planted paths (node labels) and (k x num_flows) weights;
+    # each path visits between 1 and max_inner_nodes (default num_nodes // 3) inner nodes, so the path
+    # length and num_nodes together set |E|. Planted paths may coincide, in which case fewer than k suffice.
+    rng = random.Random(seed)
+    max_inner_nodes = max_inner_nodes or max(1, num_nodes // 3)
+    G = nx.DiGraph()
+    paths, weights = [], []
+    for _ in range(k):
+        path = [0] + sorted(rng.sample(range(1, num_nodes - 1), rng.randint(1, max_inner_nodes))) + [num_nodes - 1]
+        path_weights = [rng.randint(1, max_weight) for _ in range(num_flows)]
+        for u, v in zip(path[:-1], path[1:]):
+            if not G.has_edge(str(u), str(v)):
+                G.add_edge(str(u), str(v), **{flow_attr: [0] * num_flows})
+            G[str(u)][str(v)][flow_attr] = [f + w for f, w in zip(G[str(u)][str(v)][flow_attr], path_weights)]
+        paths.append([str(n) for n in path])
+        weights.append(path_weights)
+    return G, paths, weights
+
+
+def add_noise(G: nx.DiGraph, noise: int, seed: int, flow_attr: str = "flow"):
+    # copy of G with every flow value moved by a uniform integer in [-noise, noise], clipped at 0; the input
+    # for the MinErr / MinPathErr / BoundedErr variants
+    rng = random.Random(seed)
+    noisy = G.copy()
+    for u, v, data in G.edges(data=True):
+        noisy[u][v][flow_attr] = [max(0, f + rng.randint(-noise, noise)) for f in data[flow_attr]]
+    return noisy
+
+
+def widen(G: nx.DiGraph, width: int, flow_attr: str = "flow"):
+    # copy of G with every flow value f replaced by the interval (max(0, f - width), f + width); the input for
+    # the Inexact variant
+    inexact = G.copy()
+    for u, v, data in G.edges(data=True):
+        inexact[u][v][flow_attr] = [(max(0, f - width), f + width) for f in data[flow_attr]]
+    return inexact
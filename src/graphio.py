@@ -0,0 +1,183 @@
+import numpy as np
+import networkx as nx
+
+# Files holding many multi-flow graphs, read one graph at a time. Two formats:
+#
+# text, catfish style extended to m flows and interval bounds:
+#     # graph number = 0 name = sample_1
+#     4                          <- number of nodes
+#     0 1 5 3                    <- tail, head and one value per flow
+#     1 3 2:4 1:1                <- or a lower:upper bound per flow, for the inexact variant
+#
+# binary: the magic b"CFDGRAPH", then one record per graph of six little-endian int64s (num_nodes, num_edges,
+# num_flows, bounds, is_float, name length), the name padded to 8 bytes, the (|E| x 2) int64 edges and the
+# (|E| x m) or (|E| x m x 2) flows as int64 or float64. It is memory mapped, so the arrays of a record are
+# views into the file and only the pages a caller touches are read.
+#
+# Nodes are the integers 0..num_nodes-1. A graph whose labels are not all non-negative integers is written with
+# its nodes numbered in G.nodes() order. Readers yield nx.DiGraphs with flow_attr lists (and the name in
+# G.graph["name"]), the form every driver takes, or with arrays=True the lighter GraphArrays.
+MAGIC = b"CFDGRAPH"
+HEADER_FIELDS = 6
+
+
+class GraphArrays:
+    # edges is an (|E| x 2) int array of node ids, flows an (|E| x m) or (|E| x m x 2) array
+    def __init__(self, name: str, num_nodes: int, edges, flows):
+        self.name = name
+        self.num_nodes = num_nodes
+        self.edges = edges
+        self.flows = flows
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    @property
+    def num_flows(self) -> int:
+        return self.flows.shape[1]
+
+    @property
+    def bounds(self) -> bool:
+        return self.flows.ndim == 3
+
+    def to_digraph(self, flow_attr: str = "flow") -> nx.DiGraph:
+        G = nx.DiGraph(name=self.name)
+        G.add_edges_from((u, v, {flow_attr: flows}) for (u, v), flows in zip(self.edges.tolist(), self.flows.tolist()))
+        return G
+
+    @classmethod
+    def from_digraph(cls, G: nx.DiGraph, flow_attr: str = "flow", name: str = None):
+        nodes = list(G.nodes())
+        if all(isinstance(v, (int, np.integer)) and v >= 0 for v in nodes):
+            ids = {v: int(v) for v in nodes}
+        else:
+            ids = {v: n for n, v in enumerate(nodes)}
+        edges = np.array([(ids[u], ids[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+        flows = np.array([data[flow_attr] for u, v, data in G.edges(data=True)])
+        if len(edges) == 0:
+            flows = flows.reshape(0, 0)
+        num_nodes = max(ids.values()) + 1 if ids else 0
+        return cls(name if name is not None else G.graph.get("name", ""), num_nodes, edges, flows)
+
+
+def read_graphs(path: str, arrays: bool = False, flow_attr: str = "flow"):
+    # picks the format from the first bytes of the file
+    with open(path, "rb") as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+    return read_binary(path, arrays, flow_attr) if binary else read_text(path, arrays, flow_attr)
+
+
+def _finish(graph: GraphArrays, arrays: bool, flow_attr: str):
+    return graph if arrays else graph.to_digraph(flow_attr)
+
+
+def read_text(path: str, arrays: bool = False, flow_attr: str = "flow"):
+    with open(path) as file:
+        name, num_nodes, edges, flows = None, None, [], []
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                if name is not None:
+                    yield _finish(_text_graph(name, num_nodes, edges, flows), arrays, flow_attr)
+                name = line.split("name =", 1)[1].strip() if "name =" in line else ""
+                num_nodes, edges, flows = None, [], []
+                continue
+            if name is None:
+                raise ValueError(f"{path}:{line_number}: expected a '# graph' header")
+            tokens = line.split()
+            if num_nodes is None:
+                num_nodes = int(tokens[0])
+                continue
+            if len(tokens) < 3:
+                raise ValueError(f"{path}:{line_number}: an edge needs a tail, a head and at least one flow value")
+            edges.append((int(tokens[0]), int(tokens[1])))
+            flows.append([_value(token) for token in tokens[2:]])
+        if name is not None:
+            yield _finish(_text_graph(name, num_nodes, edges, flows), arrays, flow_attr)
+
+
+def _value(token: str):
+    if ":" in token:
+        return [_value(bound) for bound in token.split(":", 1)]
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _text_graph(name: str, num_nodes: int, edges: list, flows: list) -> GraphArrays:
+    try:
+        flow_array = np.array(flows)
+    except ValueError:
+        raise ValueError(f"Graph {name!r} has edges with different numbers of flows")
+    if flow_array.dtype == object:
+        raise ValueError(f"Graph {name!r} has edges with different numbers of flows")
+    if not edges:
+        flow_array = flow_array.reshape(0, 0)
+    return GraphArrays(name, num_nodes or 0, np.array(edges, dtype=np.int64).reshape(-1, 2), flow_array)
+
+
+def write_text(path: str, graphs, flow_attr: str = "flow") -> int:
+    # graphs is any iterable of nx.DiGraphs or GraphArrays, consumed one at a time; returns how many were written
+    count = 0
+    with open(path, "w") as file:
+        for graph in graphs:
+            if not isinstance(graph, GraphArrays):
+                graph = GraphArrays.from_digraph(graph, flow_attr)
+            lines = [f"# graph number = {count} name = {graph.name}", str(graph.num_nodes)]
+            for (u, v), flows in zip(graph.edges.tolist(), graph.flows.tolist()):
+                values = (f"{value[0]}:{value[1]}" for value in flows) if graph.bounds else map(str, flows)
+                lines.append(f"{u} {v} " + " ".join(values))
+            file.write("\n".join(lines) + "\n")
+            count += 1
+    return count
+
+
+def _padded(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+def read_binary(path: str, arrays: bool = False, flow_attr: str = "flow"):
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a binary graph file")
+        file.seek(0, 2)
+        size = file.tell()
+    if size == len(MAGIC):
+        return
+    data = np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+    offset = len(MAGIC)
+    while offset < size:
+        num_nodes, num_edges, num_flows, bounds, is_float, name_length = (int(x) for x in data[offset:offset + 8 * HEADER_FIELDS].view("<i8"))
+        offset += 8 * HEADER_FIELDS
+        name = bytes(data[offset:offset + name_length]).decode()
+        offset += _padded(name_length)
+        edges = data[offset:offset + 16 * num_edges].view("<i8").reshape(num_edges, 2)
+        offset += 16 * num_edges
+        shape = (num_edges, num_flows, 2) if bounds else (num_edges, num_flows)
+        nbytes = 8 * int(np.prod(shape))
+        flows = data[offset:offset + nbytes].view("<f8" if is_float else "<i8").reshape(shape)
+        offset += nbytes
+        yield _finish(GraphArrays(name, num_nodes, edges, flows), arrays, flow_attr)
+
+
+def write_binary(path: str, graphs, flow_attr: str = "flow") -> int:
+    # graphs is any iterable of nx.DiGraphs or GraphArrays, consumed one at a time; returns how many were written
+    count = 0
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        for graph in graphs:
+            if not isinstance(graph, GraphArrays):
+                graph = GraphArrays.from_digraph(graph, flow_attr)
+            is_float = graph.num_edges > 0 and not np.issubdtype(graph.flows.dtype, np.integer)
+            name = graph.name.encode()
+            header = [graph.num_nodes, graph.num_edges, graph.num_flows if graph.num_edges > 0 else 0, int(graph.bounds), int(is_float), len(name)]
+            file.write(np.array(header, dtype="<i8").tobytes())
+            file.write(name.ljust(_padded(len(name)), b"\0"))
+            file.write(np.ascontiguousarray(graph.edges, dtype="<i8").tobytes())
+            file.write(np.ascontiguousarray(graph.flows, dtype="<f8" if is_float else "<i8").tobytes())
+            count += 1
+    return count
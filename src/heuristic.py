@@ -0,0 +1,98 @@
+import numpy as np
+import networkx as nx
+import flowgraph
+import result
+
+# Greedy multi-flow decomposition without a solver: repeatedly take the widest s-t path for the flow column
+# with the largest remaining value, give it the componentwise minimum of the remaining flows along it as its
+# weights, and subtract. Every step empties at least one (edge, flow) entry, so at most |E| * m paths come out.
+TOLERANCE = 1e-9
+
+
+def greedy_decomposition(flow_graph: flowgraph.FlowGraph, flows=None, max_paths: int = None):
+    # returns (paths, weights, residual): node-label paths, their (p x m) weights and the (|E| x m) flow
+    # left unexplained, which is zero when flows is a conserving flow
+    residual = np.array(flow_graph.upper_flows() if flows is None else flows, dtype=float)
+    tails, heads = flow_graph.tails.tolist(), flow_graph.heads.tolist()
+    # edges ordered by the topological position of their head, so every edge into a node is relaxed
+    # before any edge out of it
+    rank = np.empty(flow_graph.num_nodes, dtype=np.int64)
+    rank[flow_graph.topological_order] = np.arange(len(flow_graph.topological_order))
+    edge_order = np.argsort(rank[flow_graph.heads], kind="stable")
+    source, sink = flow_graph.source, flow_graph.sink
+
+    found = {}
+    while max_paths is None or len(found) < max_paths:
+        column_max = residual.max(axis=0) if flow_graph.num_edges > 0 else np.zeros(flow_graph.num_flows)
+        path_edges = None
+        for j in np.argsort(-column_max):
+            if column_max[j] <= TOLERANCE:
+                break
+            column = residual[:, j]
+            positive = edge_order[column[edge_order] > TOLERANCE]
+            path_edges = _widest_path(positive.tolist(), column.tolist(), tails, heads, flow_graph.num_nodes, source, sink)
+            if path_edges is not None:
+                break
+        if path_edges is None:
+            break
+        weights = residual[path_edges].min(axis=0)
+        residual[path_edges] -= weights
+        residual[residual <= TOLERANCE] = 0
+        key = tuple(path_edges)
+        found[key] = found[key] + weights if key in found else weights
+
+    paths = [[flow_graph.nodes[source]] + [flow_graph.nodes[flow_graph.heads[e]] for e in key] for key in found]
+    weights = np.array(list(found.values())) if found else np.zeros((0, flow_graph.num_flows))
+    return paths, weights, residual
+
+
+def _widest_path(edges: list, column: list, tails: list, heads: list, num_nodes: int, source: int, sink: int):
+    # edge ids of the s-t path maximizing the smallest column value along it, or None if that is 0;
+    # edges are the candidate edge ids in head-topological order
+    width = [0] * num_nodes
+    best_edge = [-1] * num_nodes
+    width[source] = float("inf")
+    for e in edges:
+        w = min(width[tails[e]], column[e])
+        if w > width[heads[e]]:
+            width[heads[e]], best_edge[heads[e]] = w, e
+    if width[sink] <= TOLERANCE:
+        return None
+    path_edges = []
+    n = sink
+    while n != source:
+        path_edges.append(best_edge[n])
+        n = tails[best_edge[n]]
+    return path_edges[::-1]
+
+
+def feasible_decomposition(flow_graph: flowgraph.FlowGraph, lower, upper, integral: bool = False):
+    # decomposes the midpoint of [lower, upper] (rounded down if integral) and returns (paths, weights) if
+    # the paths' summed flow stays inside the bounds on every edge, so that they form a solution of the
+    # k = len(paths) model; None otherwise, and also when no path is needed at all (every flow 0, or within
+    # the bounds as it is), as there is no k = 0 model and the search must still try k = 1
+    lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+    target = (lower + upper) / 2
+    if integral:
+        target = np.floor(target + TOLERANCE)
+    paths, weights, residual = greedy_decomposition(flow_graph, target)
+    if not paths:
+        return None
+    explained = target - residual
+    if (explained < lower - TOLERANCE).any() or (explained > upper + TOLERANCE).any():
+        return None
+    if integral and not np.allclose(weights, np.round(weights)):
+        return None
+    return paths, weights
+
+
+def decompose(G: nx.DiGraph, num_flows: int, flow_attr: str = "flow", flow_graph: flowgraph.FlowGraph = None, max_paths: int = None):
+    # fast mode: the greedy decomposition as a DecompResult whose objective is the total unexplained flow;
+    # inexact flows are decomposed at the midpoint of their bounds
+    flow_graph = flow_graph if flow_graph is not None else flowgraph.FlowGraph(G, num_flows, flow_attr)
+    if not flow_graph.is_st_graph():
+        print("uh oh")
+        raise ValueError('Input graph is not an st graph')
+    flows = flow_graph.flows.mean(axis=2) if flow_graph.flows.ndim == 3 else flow_graph.flows
+    paths, weights, residual = greedy_decomposition(flow_graph, flows, max_paths)
+    return result.DecompResult(paths, weights, residual.sum().item(), len(paths), "heuristic")
@@ -0,0 +1,86 @@
+import time
+import functools
+import contextlib
+import backends
+
+# Where the time goes in a decomposition. Every KCommonFlowDecomp* model keeps a ModelStats in .stats with wall
+# seconds per phase (validate, init, build, warm_start, solve, extract) and, after each solve, the model size
+# and solver counters; every driver keeps a RunStats in .stats with its own phases (lower_bound, heuristic,
+# solve) and one record per k it solved. A hook, if given, is called with each per-k record as it is made.
+SOLVER_ATTRS = {"vars": "NumVars", "constrs": "NumConstrs", "nonzeros": "NumNZs", "work": "Work", "nodes": "NodeCount",
+                "gap": "MIPGap", "status": "status", "objective": "ObjVal", "bound": "ObjBound", "solver_seconds": "Runtime"}
+
+
+class ModelStats:
+    def __init__(self, hook=None, started: float = None):
+        self.hook = hook
+        self.seconds = {}
+        self.solves = []
+        self._mark = started if started is not None else time.perf_counter()
+
+    def add_time(self, phase: str, seconds: float):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def lap(self, phase: str):
+        # charges the time since the previous lap (or since started) to phase
+        now = time.perf_counter()
+        self.add_time(phase, now - self._mark)
+        self._mark = now
+
+    def record_solve(self, model, k: int):
+        record = dict(k=k, seconds=dict(self.seconds))
+        for key, name in SOLVER_ATTRS.items():
+            record[key] = backends.attr(model, name)
+        if record["objective"] is not None and backends.attr(model, "SolCount") == 0:
+            record["objective"] = None
+        self.solves.append(record)
+        if self.hook is not None:
+            self.hook(record)
+        return record
+
+    def as_dict(self):
+        return dict(seconds=dict(self.seconds), solves=list(self.solves))
+
+
+class RunStats:
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.seconds = {}
+        self.models = []
+
+    def add_time(self, phase: str, seconds: float):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def add_model(self, record: dict):
+        # the hook handed to every model the driver builds
+        self.models.append(record)
+        if self.hook is not None:
+            self.hook(record)
+
+    def as_dict(self):
+        return dict(seconds=dict(self.seconds), models=list(self.models))
+
+
+def timed(phase: str):
+    # charges every call of the decorated method to phase in self.stats; a "solve" also records the model's
+    # size and solver counters for the current k
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.stats.add_time(phase, time.perf_counter() - start)
+                if phase == "solve" and isinstance(self.stats, ModelStats):
+                    self.stats.record_solve(self.model, self.k)
+        return wrapper
+    return decorate
@@ -1,116 +1,173 @@
+import time
 import networkx as nx
-import gurobipy as gb
 import utils
+import symmetry
+import matrixbuilder
+import products
+import backends
+import instrument
+import kmodel
+import flowgraph
+import result
 
 class KCommonFlowDecompInexact:
-    def __init__(self, G: nx.DiGraph, num_flows: int, k: int, flow_attr: str = "flow", subpath_constr: list = []):
-        self.model = gb.Model()
-        if not nx.is_directed_acyclic_graph(G):
+    def __init__(self, G: nx.DiGraph, num_flows: int, k: int, flow_attr: str = "flow", subpath_constr: list = [], symmetry_breaking: str = None, builder: str = "python", linearization: str = "mccormick", names: bool = True, backend: str = "gurobi", flow_graph: flowgraph.FlowGraph = None, hook=None):
+        started = time.perf_counter()
+        self.flow_graph = flow_graph if flow_graph is not None else flowgraph.FlowGraph(G, num_flows, flow_attr)
+        self.model = backends.new_model(backend)
+        if not self.flow_graph.is_dag():
             print("uh oh")
             raise ValueError('Input graph is not a directed acyclic graph')
-        if not utils.check_st_graph(G):
+        if not self.flow_graph.is_st_graph():
             print("uh oh")
             raise ValueError('Input graph is not an st graph')
-        if not utils.check_correct_num_flows(G, num_flows, flow_attr):
+        if not self.flow_graph.has_correct_num_flows():
             print("uh oh")
             raise ValueError('Number of flows does not match')
-        if not utils.check_valid_inexact_flows(G, num_flows, flow_attr):
+        if not self.flow_graph.check_inexact_flows():
             print("uh oh")
         if not utils.check_subpath_constr(G, subpath_constr):
             print("uh oh")
+        self.stats = instrument.ModelStats(hook, started)
+        self.stats.lap("validate")
         self.G = G
         self.num_flows = num_flows
         self.k = k
+        symmetry.check_symmetry_breaking(symmetry_breaking)
+        self.symmetry_breaking = symmetry_breaking
+        matrixbuilder.check_builder(builder)
+        self.builder = builder
+        products.check_linearization(linearization)
+        self.linearization = linearization
+        backends.check_backend(backend, builder, linearization)
+        self.backend = backend
+        self.names = names
         self.flow_attr = flow_attr
-        self.w_max = utils.get_max_inexact_flow(self.G, self.num_flows, self.flow_attr)
+        self.w_max = self.flow_graph.max_flow()
+        # pi[u,v,i,j] never exceeds the upper bound of f_uvj, and so no path weight exceeds the largest upper bound of its column
+        self.pi_ub = self.flow_graph.upper_flows().astype(float)
+        self.w_ub = self.pi_ub.max(axis=0)
 
         self.path_indexes = [(i, j) for i in range(self.k) for j in range(self.num_flows)]
         self.edge_indexes = [(u, v, i) for u, v in self.G.edges() for i in range(self.k)]
-        self.edge_flows = {(u, v, j): data[self.flow_attr][j] for u, v, data in self.G.edges(data=True) for j in
-                           range(self.num_flows)}
+        self.edge_flows = flowgraph.EdgeFlows(self.flow_graph)
         self.pi_indexes = [(u, v, i, j) for u, v in self.G.edges() for i in range(self.k) for j in
                            range(self.num_flows)]
+        self.stats.lap("init")
 
-
+    @instrument.timed("build")
     def build_model(self):
 
         self.variable_name_prefixes = []
+        if self.builder == "matrix":
+            self.build_model_matrix()
+            return
 
-        self.path_vars = self.add_variables(indexes=self.path_indexes, name_prefix='w', ub=self.w_max)
+        self.path_vars = self.add_variables(indexes=self.path_indexes, name_prefix='w', ub=self.w_bound)
         self.edge_vars = self.add_variables(indexes=self.edge_indexes, name_prefix='x', var_type="binary")
-        self.pi_vars = self.add_variables(indexes=self.pi_indexes, name_prefix='pi', ub=self.w_max)
+        self.pi_vars = self.add_variables(indexes=self.pi_indexes, name_prefix='pi', ub=self.pi_bound)
         print("added ", len(self.path_vars), " flow-paths, ", len(self.edge_vars), " path-edges, and ", len(self.pi_vars), " pi vars")
 
+        for i in range(self.k):
+            self.add_path_constraints(i)
+
+        self.flow_lower_constrs = {}
+        self.flow_upper_constrs = {}
+        for u, v in self.G.edges():
+            for j in range(self.num_flows):
+                self.flow_lower_constrs[u, v, j] = self.model.addConstr(backends.quicksum(self.pi_vars[u, v, i, j] for i in range(self.k)) >= self.edge_flows[u, v, j][0], name=f"lowerbound_flow_u={u}_v={v}_j={j}")
+                self.flow_upper_constrs[u, v, j] = self.model.addConstr(backends.quicksum(self.pi_vars[u, v, i, j] for i in range(self.k)) <= self.edge_flows[u, v, j][1], name=f"upperbound_flow_u={u}_v={v}_j={j}")
+
+    def build_model_matrix(self):
+        edges, W, X, P = matrixbuilder.add_path_blocks(self, var_type="integer")
+        flows = matrixbuilder.edge_flow_array(self)
+        path_sum = matrixbuilder.path_sum_matrix(len(edges), self.k, self.num_flows)
+        self.flow_lower_constrs = matrixbuilder.constr_dict(edges, matrixbuilder.add_rows(self.model, [(P, path_sum)], ">", flows[:, :, 0]), self.num_flows)
+        self.flow_upper_constrs = matrixbuilder.constr_dict(edges, matrixbuilder.add_rows(self.model, [(P, path_sum)], "<", flows[:, :, 1]), self.num_flows)
+        for i in range(self.k):
+            symmetry.add_path_order_constraint(self, i)
+
+    def add_path_constraints(self, i: int):
         for v in self.G.nodes():
             predecessors = list(self.G.predecessors(v))
             successors = list(self.G.neighbors(v))
             if len(predecessors) == 0:
-                for i in range(self.k):
-                    self.model.addConstr(gb.quicksum(self.edge_vars[v, w, i] for w in successors) == 1, name=f"single_path_i={i}")
+                self.model.addConstr(backends.quicksum(self.edge_vars[v, w, i] for w in successors) == 1, name=f"single_path_i={i}")
             elif len(successors) != 0:
-                for i in range(self.k):
-                    self.model.addConstr(gb.quicksum(self.edge_vars[u, v, i] for u in predecessors) == gb.quicksum(self.edge_vars[v, w, i] for w in successors), name=f"flow_cons_v={v}_i={i}")
+                self.model.addConstr(backends.quicksum(self.edge_vars[u, v, i] for u in predecessors) == backends.quicksum(self.edge_vars[v, w, i] for w in successors), name=f"flow_cons_v={v}_i={i}")
 
-        for u, v in self.G.edges():
+        for e, (u, v) in enumerate(self.flow_graph.edges):
             for j in range(self.num_flows):
-                self.model.addConstr(gb.quicksum(self.pi_vars[u, v, i, j] for i in range(self.k)) >= self.edge_flows[u, v, j][0], name=f"lowerbound_flow_u={u}_v={v}_j={j}")
-                self.model.addConstr(gb.quicksum(self.pi_vars[u, v, i, j] for i in range(self.k)) <= self.edge_flows[u, v, j][1], name=f"upperbound_flow_u={u}_v={v}_j={j}")
-                for i in range(self.k):
-                    self.add_binary_continuous_product_constraint(binary_var=self.edge_vars[u, v, i], continuous_var=self.path_vars[i, j], product_var=self.pi_vars[u, v, i, j], lb=0, ub=self.w_max, name=f"pi_u={u}_v={v}_i={i}_j={j}")
-
-    def solve_model(self):
-        self.model.optimize()
-        if self.model.status == gb.GRB.Status.OPTIMAL:
-            return True
-        else:
-            return False
+                self.add_binary_continuous_product_constraint(binary_var=self.edge_vars[u, v, i], continuous_var=self.path_vars[i, j], product_var=self.pi_vars[u, v, i, j], lb=0, ub=self.w_ub[j], product_ub=self.pi_ub[e, j], name=f"pi_u={u}_v={v}_i={i}_j={j}")
+        symmetry.add_path_order_constraint(self, i)
+
+    @instrument.timed("build")
+    def add_path(self):
+        # grows the live model from k to k+1 paths; only the coupling rows are touched in place
+        i = kmodel.add_path_variables(self)
+        self.add_path_constraints(i)
+        for (u, v, j), constr in self.flow_lower_constrs.items():
+            self.model.chgCoeff(constr, self.pi_vars[u, v, i, j], 1)
+            self.model.chgCoeff(self.flow_upper_constrs[u, v, j], self.pi_vars[u, v, i, j], 1)
+        self.model.update()
+
+    @instrument.timed("solve")
+    def solve_model(self, callback=None):
+        # the model has no objective, so any incumbent solves this k, also one found before a time limit;
+        # callback, if given, gets a DecompResult for every incumbent as the solver finds it
+        backends.optimize(self.model, self.incumbent_handler(callback))
+        return self.model.SolCount > 0
+
+    @instrument.timed("extract")
+    def get_result(self, incumbent: backends.Incumbent = None):
+        return result.model_result(self, incumbent=incumbent)
+
+    def incumbent_handler(self, callback):
+        if callback is None:
+            return None
+        return lambda incumbent: callback(self.get_result(incumbent))
+
+    def dispose(self):
+        kmodel.dispose(self)
 
     def get_model_solution(self):
-        solution = ""
-        for i in range(self.k):
-            solution = solution + f"Path {i+1} (carries weight"
-            for j in range(self.num_flows):
-                if j == self.num_flows - 1:
-                    solution = solution + " and"
-                solution = solution + f" {self.path_vars[(i, j)].X} for flow {j+1}"
-                if j < self.num_flows - 1 and self.num_flows > 2:
-                    solution = solution + ","
-            solution = solution + "):\n"
-            for u,v in self.G.edges():
-                if self.edge_vars[u, v, i].X != 0:
-                    solution = solution + f"{u}, "
-            solution = solution + "t\n"
-        return solution
+        return self.get_result().format()
+
+    @instrument.timed("extract")
+    def get_model_paths(self):
+        return result.model_paths(self)
 
+    @instrument.timed("extract")
+    def get_model_weights(self):
+        return result.model_weights(self).tolist()
+
+    @instrument.timed("warm_start")
+    def warm_start(self, paths: list, weights: list):
+        kmodel.warm_start(self, paths, weights)
+
+    def w_bound(self, index):
+        return float(self.w_ub[index[1]])
+
+    def pi_bound(self, index):
+        u, v, i, j = index
+        return float(self.pi_ub[self.flow_graph.edge_ids[u, v], j])
 
     def add_variables(self, indexes, name_prefix: str, lb=0, ub=1, var_type="integer"):
-        for prefix in self.variable_name_prefixes:
-            if prefix.startswith(name_prefix) or name_prefix.startswith(prefix):
-                print("uh oh")
-                raise ValueError(
-                    f"Variable name prefix {name_prefix} conflicts with existing variable name prefix {prefix}. Use a different name prefix."
-                )
-
-        self.variable_name_prefixes.append(name_prefix)
-
-        var_type_map = {
-            "integer": gb.GRB.INTEGER,
-            "continuous": gb.GRB.CONTINUOUS,
-            "binary": gb.GRB.BINARY,
-        }
-        vars = {}
-        for index in indexes:
-            vars[index] = self.model.addVar(
-                lb=lb,
-                ub=ub,
-                vtype=var_type_map[var_type],
-                name=f"{name_prefix}{index}",
-            )
-        self.model.update()
-        return vars
+        return kmodel.add_variables(self, indexes, name_prefix, lb, ub, var_type)
+
+    def extend_variables(self, vars, indexes, name_prefix: str, lb=0, ub=1, var_type="integer"):
+        return kmodel.extend_variables(self, vars, indexes, name_prefix, lb, ub, var_type)
 
-    def add_binary_continuous_product_constraint(self, binary_var, continuous_var, product_var, lb, ub, name: str):
-        self.model.addConstr(product_var <= ub * binary_var, name=name + "_a")
+    def add_binary_continuous_product_constraint(self, binary_var, continuous_var, product_var, lb, ub, name: str, product_ub=None):
+        # ub bounds continuous_var; product_ub, when given, is a tighter bound on product_var itself
+        if product_ub == 0:
+            # product_var is fixed at 0 by its bound (a zero flow entry), so of every form only x=1 -> w=0 is left
+            self.model.addConstr(continuous_var <= ub * (1 - binary_var), name=name + "_zero")
+            return
+        if self.linearization != "mccormick":
+            products.add_product_constraint(self, binary_var, continuous_var, product_var, lb, ub, name, product_ub)
+            return
+        self.model.addConstr(product_var <= (ub if product_ub is None else product_ub) * binary_var, name=name + "_a")
         self.model.addConstr(product_var >= lb * binary_var, name=name + "_b")
         self.model.addConstr(product_var <= continuous_var - lb * (1 - binary_var), name=name + "_c")
         self.model.addConstr(product_var >= continuous_var - ub * (1 - binary_var), name=name + "_d")
\ No newline at end of file
@@ -0,0 +1,91 @@
+import gurobipy as gb
+import symmetry
+import pathcount
+
+# The parts the five KCommonFlowDecomp* models share: their variable families, growing a live model by one
+# path, MIP starts from a known decomposition and freeing the solver's copy. Every model keeps w as
+# path_vars[i, j], x as edge_vars[u, v, i] and pi as pi_vars[u, v, i, j] (and the exact and bounded-error
+# models r as subpath_vars[i, p]); what differs between them, the rows that tie the paths to the flows, stays
+# in the models.
+
+VAR_TYPES = {
+    "integer": gb.GRB.INTEGER,
+    "continuous": gb.GRB.CONTINUOUS,
+    "binary": gb.GRB.BINARY,
+}
+
+
+def add_variables(decomp, indexes, name_prefix: str, lb=0, ub=1, var_type="continuous"):
+    # a new family of variables, whose name prefix must not clash with that of any family before it
+    for prefix in decomp.variable_name_prefixes:
+        if prefix.startswith(name_prefix) or name_prefix.startswith(prefix):
+            print("uh oh")
+            raise ValueError(
+                f"Variable name prefix {name_prefix} conflicts with existing variable name prefix {prefix}. "
+                f"Use a different name prefix."
+            )
+
+    decomp.variable_name_prefixes.append(name_prefix)
+    return extend_variables(decomp, {}, indexes, name_prefix, lb, ub, var_type)
+
+
+def extend_variables(decomp, vars, indexes, name_prefix: str, lb=0, ub=1, var_type="continuous"):
+    # adds vars[index] for every index; ub may be a function of the index
+    for index in indexes:
+        vars[index] = decomp.model.addVar(
+            lb=lb,
+            ub=ub(index) if callable(ub) else ub,
+            vtype=VAR_TYPES[var_type],
+            name=f"{name_prefix}{index}" if decomp.names else "",
+        )
+    decomp.model.update()
+    return vars
+
+
+def add_path_variables(decomp):
+    # first half of growing a live model from k to k+1 paths: the new path's w, x and pi (and r); returns its
+    # index i, for the model to add the path's own rows and put its pi into the rows shared by all paths
+    i = decomp.k
+    decomp.k += 1
+    path_indexes = [(i, j) for j in range(decomp.num_flows)]
+    edge_indexes = [(u, v, i) for u, v in decomp.G.edges()]
+    pi_indexes = [(u, v, i, j) for u, v in decomp.G.edges() for j in range(decomp.num_flows)]
+    decomp.path_indexes += path_indexes
+    decomp.edge_indexes += edge_indexes
+    decomp.pi_indexes += pi_indexes
+
+    decomp.extend_variables(decomp.path_vars, indexes=path_indexes, name_prefix='w', ub=decomp.w_bound)
+    decomp.extend_variables(decomp.edge_vars, indexes=edge_indexes, name_prefix='x', var_type="binary")
+    decomp.extend_variables(decomp.pi_vars, indexes=pi_indexes, name_prefix='pi', ub=decomp.pi_bound)
+    if getattr(decomp, "subpath_vars", None) is not None:
+        subpath_indexes = [(i, p) for p in range(len(decomp.subpath_constr))]
+        decomp.subpath_indexes += subpath_indexes
+        decomp.extend_variables(decomp.subpath_vars, indexes=subpath_indexes, name_prefix='r', var_type="binary")
+    return i
+
+
+def warm_start(decomp, paths: list, weights: list, objective: float = None):
+    # a MIP start from (paths, weights); paths beyond them reuse the first route with zero weight. objective,
+    # the error of the decomposition, also becomes the cutoff of the error models.
+    paths = [paths[i] if i < len(paths) else paths[0] for i in range(decomp.k)]
+    weights = [weights[i] if i < len(weights) else [0] * decomp.num_flows for i in range(decomp.k)]
+    paths, weights = symmetry.sort_paths(decomp, paths, weights)
+    for i in range(decomp.k):
+        path_edges = set(zip(paths[i][:-1], paths[i][1:]))
+        for j in range(decomp.num_flows):
+            decomp.path_vars[i, j].Start = weights[i][j]
+        pathcount.set_start(decomp, i, weights[i])
+        for u, v in decomp.G.edges():
+            used = (u, v) in path_edges
+            decomp.edge_vars[u, v, i].Start = 1 if used else 0
+            for j in range(decomp.num_flows):
+                decomp.pi_vars[u, v, i, j].Start = weights[i][j] if used else 0
+    if objective is not None:
+        # the incumbent itself sits exactly on the cutoff, so leave a little room for it
+        decomp.model.setParam('Cutoff', objective + max(1e-6, 1e-6 * abs(objective)))
+
+
+def dispose(decomp):
+    # frees the solver's copy of the model now instead of whenever the model object is collected; read the
+    # paths and results first, as nothing can be read from the model afterwards
+    decomp.model.dispose()
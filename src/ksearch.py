@@ -0,0 +1,215 @@
+import os
+import time
+import multiprocessing as mp
+import gurobipy as gb
+import heuristic
+import result as decomp_result
+from multiprocessing.connection import wait
+
+
+class Budget:
+    # Time and gap limits for one k search. time_limit bounds the whole search and is shared evenly among the
+    # k values still to be tried, so an early hard k cannot eat all of it; k_time_limit caps every single k;
+    # mip_gap is the relative gap at which each solve may stop. The clock starts with start().
+    def __init__(self, time_limit: float = None, k_time_limit: float = None, mip_gap: float = None):
+        self.time_limit = time_limit
+        self.k_time_limit = k_time_limit
+        self.mip_gap = mip_gap
+        self.deadline = None
+
+    def start(self):
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+
+    def remaining(self):
+        if self.deadline is None:
+            return float("inf")
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def params(self, ks_left: int = 1):
+        # solver parameters for the next solve when ks_left k values (this one included) may still need one
+        params = {}
+        limit = min(self.remaining() / max(1, ks_left), self.k_time_limit if self.k_time_limit is not None else float("inf"))
+        if limit < float("inf"):
+            params["TimeLimit"] = limit
+        if self.mip_gap is not None:
+            params["MIPGap"] = self.mip_gap
+        return params
+
+    def unlimited(self):
+        # no limit can cut a solve short, so whatever the search returns is exact
+        return self.time_limit is None and self.k_time_limit is None and self.mip_gap is None
+
+    def apply(self, model, ks_left: int = 1):
+        for name, value in self.params(ks_left).items():
+            model.setParam(name, value)
+
+
+def _solve_k(decomp_class, decomp_kwargs: dict, k: int, threads: int, params: dict, conn):
+    myDecomp = None
+    try:
+        myDecomp = decomp_class(k=k, **decomp_kwargs)
+        myDecomp.build_model()
+        myDecomp.model.setParam('Threads', threads)
+        for name, value in params.items():
+            myDecomp.model.setParam(name, value)
+        if myDecomp.solve_model():
+            conn.send((k, True, myDecomp.get_result(), myDecomp.stats.solves))
+        elif myDecomp.model.status in (gb.GRB.INFEASIBLE, gb.GRB.INF_OR_UNBD):
+            conn.send((k, False, None, myDecomp.stats.solves))
+        else:
+            # stopped by a limit without a solution, which says nothing about k
+            conn.send((k, "unknown", None, myDecomp.stats.solves))
+    except Exception as e:
+        conn.send((k, None, f"{type(e).__name__}: {e}", []))
+    finally:
+        conn.close()
+        if myDecomp is not None:
+            myDecomp.dispose()
+
+
+def parallel_k_search(decomp_class, decomp_kwargs: dict, k_min: int, k_max: int, workers: int = None, threads: int = None, on_stats=None,
+                      params: dict = None):
+    # Solves k_min..k_max side by side in worker processes and returns (k, DecompResult) for the smallest
+    # feasible k, or None. Feasibility is monotone in k, so a feasible k cancels every larger k still running
+    # and an infeasible k settles every smaller one. on_stats is called in this process with the per-solve
+    # records (see instrument.ModelStats) of every k that finished. params are solver parameters for every
+    # model, e.g. a TimeLimit; a k that stops at it without a solution settles nothing.
+    workers = workers or os.cpu_count()
+    threads = threads or os.cpu_count()
+    worker_threads = max(1, threads // workers)
+    ctx = mp.get_context()
+
+    running = {}
+    next_k = k_min
+    lowest_open = k_min
+    best = None
+    try:
+        while True:
+            while len(running) < workers and next_k <= k_max and (best is None or next_k < best[0]):
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_solve_k, args=(decomp_class, decomp_kwargs, next_k, worker_threads, params or {}, child_conn), daemon=True)
+                process.start()
+                child_conn.close()
+                running[next_k] = (process, parent_conn)
+                next_k += 1
+            if best is not None and lowest_open >= best[0]:
+                return best
+            if not running:
+                return best
+
+            conns = {conn: k for k, (process, conn) in running.items()}
+            for conn in wait(list(conns)):
+                k = conns[conn]
+                if k not in running:
+                    continue
+                try:
+                    _, feasible, solution, solves = conn.recv()
+                except EOFError:
+                    feasible, solution, solves = None, "worker exited without a result", []
+                if on_stats is not None:
+                    for record in solves:
+                        on_stats(record)
+                process, _ = running.pop(k)
+                process.join()
+                conn.close()
+                if feasible is None:
+                    raise RuntimeError(f"Solving k={k} failed: {solution}")
+                if feasible == "unknown":
+                    continue
+                if feasible:
+                    if best is None or k < best[0]:
+                        best = (k, solution)
+                    for other in [other for other in running if other > k]:
+                        _cancel(running.pop(other))
+                else:
+                    lowest_open = max(lowest_open, k + 1)
+                    for other in [other for other in running if other < k]:
+                        _cancel(running.pop(other))
+    finally:
+        for worker in running.values():
+            _cancel(worker)
+
+
+def _cancel(worker):
+    process, conn = worker
+    process.terminate()
+    process.join()
+    conn.close()
+
+
+def galloping_k_search(solve_k, k_min: int, k_max: int, k_upper: int = None, discard=None):
+    # Returns (k, result) for the smallest k in k_min..k_max where solve_k(k) is not None, or None.
+    # Probes k_min, k_min+1, k_min+3, k_min+7, ... until one is feasible and then bisects, which relies on
+    # feasibility being monotone in k. k_upper is a k already known to be feasible (e.g. from a heuristic);
+    # the search then bisects straight away and only confirms it with the solver if nothing smaller works.
+    # discard, if given, is called with every feasible result that a smaller k then replaces.
+    if k_min > k_max:
+        return None
+    lo = k_min - 1
+    hi = None
+    best = None
+    if k_upper is not None and k_min <= k_upper <= k_max:
+        hi = k_upper
+    while True:
+        step = 1
+        k = lo + 1
+        while hi is None:
+            result = solve_k(k)
+            if result is not None:
+                hi, best = k, (k, result)
+            elif k == k_max:
+                return None
+            else:
+                lo = k
+                k = min(k + step, k_max)
+                step *= 2
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            result = solve_k(mid)
+            if result is not None:
+                if best is not None and discard is not None:
+                    discard(best[1])
+                hi, best = mid, (mid, result)
+            else:
+                lo = mid
+        if best is not None and best[0] == hi:
+            return best
+        result = solve_k(hi)
+        if result is not None:
+            if best is not None and discard is not None:
+                discard(best[1])
+            return hi, result
+        # the k_upper hint was wrong; carry on galloping above it
+        if hi == k_max:
+            return None
+        lo, hi = hi, None
+
+
+def heuristic_start(driver, lower, upper, integral: bool = False):
+    # the greedy (paths, weights) within [lower, upper] on every edge of the driver's (validated) graph, which
+    # the k = len(paths) model accepts as it is, or None; the heuristic ignores subpath constraints, so it is
+    # skipped when there are any
+    if not driver.use_heuristic or driver.subpath_constr:
+        return None
+    return heuristic.feasible_decomposition(driver.flow_graph, lower, upper, integral)
+
+
+def apply_heuristic_start(driver, decomp):
+    # the driver's greedy start as the MIP start of decomp, if decomp has room for all its paths
+    if driver.heuristic_start is not None and decomp.k >= len(driver.heuristic_start[0]):
+        decomp.warm_start(*driver.heuristic_start)
+
+
+def heuristic_result(driver):
+    # no model solved in time (or in range): the greedy paths are still a decomposition if there are any, so
+    # once the time is up they become driver.result, on the graph the driver was given; None otherwise
+    if not driver.budget.expired() or driver.heuristic_start is None:
+        return None
+    paths, weights = driver.heuristic_start
+    paths = [driver.flow_graph.expand_path(path) for path in paths]
+    weights = driver.flow_graph.expand_weights(weights)
+    driver.result = decomp_result.DecompResult(paths, weights, 0.0, len(paths), "heuristic")
+    return driver.result
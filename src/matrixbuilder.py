@@ -0,0 +1,120 @@
+import numpy as np
+import gurobipy as gb
+
+# Bulk construction of the path blocks shared by every KCommonFlowDecomp* model with gurobi's matrix API.
+# Edges are numbered in G.edges() order, so row e of every (|E| x ...) array belongs to the e-th edge, and
+# every block is added as one sparse addMConstr call instead of one addConstr per index tuple. scipy is only
+# imported once a model is built this way, so the python builder never loads it.
+BUILDERS = ("python", "matrix")
+VAR_TYPES = {"integer": "I", "continuous": "C", "binary": "B"}
+
+
+def check_builder(builder: str):
+    if builder not in BUILDERS:
+        print("uh oh")
+        raise ValueError(f"Unknown model builder {builder}. Use one of {', '.join(BUILDERS)}.")
+
+
+def incidence_matrices(flow_graph):
+    # returns the edge list, the incidence rows (+1 in, -1 out) of every node with in- and out-edges,
+    # and the 0/1 row of edges leaving the source
+    incidence = flow_graph.incidence()
+    internal = np.flatnonzero((flow_graph.in_degree > 0) & (flow_graph.out_degree > 0))
+    source = np.flatnonzero(flow_graph.in_degree == 0)
+    return flow_graph.edges, incidence[internal], -incidence[source]
+
+
+def edge_flow_array(decomp):
+    return decomp.flow_graph.flows.astype(float)
+
+
+def add_rows(model, blocks, sense: str, rhs):
+    # adds sum(A @ vars for vars, A in blocks) (sense) rhs as a single matrix constraint
+    import scipy.sparse as sp
+    A = sp.hstack([A for _, A in blocks], format="csr")
+    variables = gb.hstack([variables.reshape(-1) for variables, _ in blocks])
+    rhs = np.asarray(rhs, dtype=float).reshape(-1)
+    if rhs.size == 1:
+        rhs = np.full(A.shape[0], rhs[0])
+    return model.addMConstr(A, variables, sense, rhs)
+
+
+def product_matrices(num_edges: int, k: int, m: int):
+    # selectors mapping the flat pi (e, i, j) rows onto x (e, i) and w (i, j)
+    import scipy.sparse as sp
+    e, i, j = np.meshgrid(np.arange(num_edges), np.arange(k), np.arange(m), indexing="ij")
+    rows = np.arange(num_edges * k * m)
+    ones = np.ones(len(rows))
+    identity = sp.identity(len(rows), format="csr")
+    to_x = sp.csr_array((ones, (rows, (e * k + i).ravel())), shape=(len(rows), num_edges * k))
+    to_w = sp.csr_array((ones, (rows, (i * m + j).ravel())), shape=(len(rows), k * m))
+    return identity, to_x, to_w
+
+
+def add_product_rows(model, P, X, W, product_ub, weight_ub, linearization: str = "mccormick"):
+    # the product rows of P[e, i, j] = X[e, i] * W[i, j] with lb=0 in the given linearization, as in
+    # add_binary_continuous_product_constraint; product_ub and weight_ub are scalars or arrays broadcastable to P.shape
+    num_edges, k, m = P.shape
+    # an entry with product_ub 0 is fixed at 0 by its bound, and only its x=1 -> w=0 row (the last one) is added
+    live = np.flatnonzero(np.broadcast_to(np.asarray(product_ub, dtype=float), P.shape).ravel() > 0)
+    if linearization == "indicator":
+        e, i, j = np.meshgrid(np.arange(num_edges), np.arange(k), np.arange(m), indexing="ij")
+        X_of_P = X.reshape(-1)[(e * k + i).ravel()]
+        W_of_P = W.reshape(-1)[(i * m + j).ravel()]
+        model.addGenConstrIndicator(X_of_P, True, P.reshape(-1) - W_of_P == 0)
+        if len(live) > 0:
+            model.addGenConstrIndicator(X_of_P[live], False, P.reshape(-1)[live] == 0)
+        return
+    import scipy.sparse as sp
+    identity, to_x, to_w = product_matrices(num_edges, k, m)
+    product_ub = np.broadcast_to(np.asarray(product_ub, dtype=float), P.shape).ravel()
+    weight_ub = np.broadcast_to(np.asarray(weight_ub, dtype=float), P.shape).ravel()
+    if len(live) > 0:
+        add_rows(model, [(P, identity[live]), (X, (-sp.diags(product_ub) @ to_x)[live])], "<", 0)
+        if linearization == "mccormick":
+            add_rows(model, [(P, identity[live]), (X, 0 * to_x[live])], ">", 0)
+        add_rows(model, [(P, identity[live]), (W, -to_w[live])], "<", 0)
+    add_rows(model, [(P, identity), (W, -to_w), (X, -sp.diags(weight_ub) @ to_x)], ">", -weight_ub)
+
+
+def path_sum_matrix(num_edges: int, k: int, m: int):
+    # maps the flat (e, i, j) block onto its sum over paths i, one row per (e, j)
+    import scipy.sparse as sp
+    e, i, j = np.meshgrid(np.arange(num_edges), np.arange(k), np.arange(m), indexing="ij")
+    return sp.csr_array((np.ones(num_edges * k * m), ((e * m + j).ravel(), np.arange(num_edges * k * m))),
+                        shape=(num_edges * m, num_edges * k * m))
+
+
+def add_path_blocks(decomp, var_type: str = "continuous"):
+    # adds w (k x m), x (|E| x k) and pi (|E| x k x m) with path conservation and the McCormick rows of
+    # pi = x * w, and exposes them through the same index dicts the python builder fills; var_type is the
+    # type the variant gives its weights, and w / pi are bounded by the variant's w_ub / pi_ub
+    edges, internal_rows, source_row = incidence_matrices(decomp.flow_graph)
+    k, m = decomp.k, decomp.num_flows
+    name = (lambda prefix: prefix) if decomp.names else (lambda prefix: "")
+    for prefix in ("w", "x", "pi"):
+        decomp.variable_name_prefixes.append(prefix)
+
+    w_ub = np.broadcast_to(decomp.w_ub, (k, m))
+    pi_ub = np.broadcast_to(decomp.pi_ub[:, None, :], (len(edges), k, m))
+    W = decomp.model.addMVar((k, m), lb=0, ub=w_ub, vtype=VAR_TYPES[var_type], name=name("w"))
+    X = decomp.model.addMVar((len(edges), k), vtype=VAR_TYPES["binary"], name=name("x"))
+    P = decomp.model.addMVar((len(edges), k, m), lb=0, ub=pi_ub, vtype=VAR_TYPES[var_type], name=name("pi"))
+
+    decomp.model.addConstr(source_row @ X == 1)
+    if internal_rows.shape[0] > 0:
+        decomp.model.addConstr(internal_rows @ X == 0)
+    add_product_rows(decomp.model, P, X, W, pi_ub, decomp.w_ub, decomp.linearization)
+    decomp.model.update()
+
+    W_list, X_list, P_list = W.tolist(), X.tolist(), P.tolist()
+    decomp.path_vars = {(i, j): W_list[i][j] for i in range(k) for j in range(m)}
+    decomp.edge_vars = {(u, v, i): X_list[e][i] for e, (u, v) in enumerate(edges) for i in range(k)}
+    decomp.pi_vars = {(u, v, i, j): P_list[e][i][j] for e, (u, v) in enumerate(edges) for i in range(k) for j in range(m)}
+    return edges, W, X, P
+
+
+def constr_dict(edges, constrs, num_flows: int):
+    # maps the flat (e, j) rows of a coupling MConstr onto the (u, v, j) keys used by add_path
+    constr_list = constrs.tolist()
+    return {(u, v, j): constr_list[e * num_flows + j] for e, (u, v) in enumerate(edges) for j in range(num_flows)}
@@ -0,0 +1,89 @@
+import backends
+
+# One model for every k up to k: a KCommonFlowDecomp* model built with minimize_paths=True gets a binary
+# z_i per path that must be set for the path to carry any weight (or slack, or claim a subpath), and a
+# count c = sum z_i. The exact variant minimizes c. The error variants minimize error + path_cost * c or,
+# with path_cost None, lexicographically first the error and then c (two solves of the same model). Bounds
+# on c restrict the number of paths, which is how set_path_range and the (k, error) Pareto front of the
+# drivers parametrize one model instead of building one per k. Paths whose z_i is unset are dropped from
+# every result read off the model.
+
+
+def add_used_variables(decomp):
+    # before the path constraints: the z_i and the count c; nothing unless the model minimizes paths
+    decomp.used_vars = {}
+    decomp.num_paths_var = None
+    if not decomp.minimize_paths:
+        return
+    decomp.used_vars = decomp.add_variables(indexes=list(range(decomp.k)), name_prefix="z", var_type="binary")
+    # at least one path, as in the per-k models: with no path in use a tie at the least error would otherwise
+    # end in an empty decomposition, where a path of weight 0 explains just as much
+    decomp.num_paths_var = decomp.add_variables(indexes=[0], name_prefix="npaths", lb=min(1, decomp.flow_graph.num_edges), ub=decomp.k)[0]
+    decomp.model.addConstr(backends.quicksum(decomp.used_vars[i] for i in range(decomp.k)) == decomp.num_paths_var,
+                           name="num_paths")
+
+
+def path_used(decomp, i: int):
+    # what "path i is in use" reads as in a row: the constant 1, unless the model minimizes paths
+    return decomp.used_vars[i] if decomp.used_vars else 1
+
+
+def add_activation_constraints(decomp, i: int):
+    if not decomp.used_vars:
+        return
+    z = decomp.used_vars[i]
+    for j in range(decomp.num_flows):
+        decomp.model.addConstr(decomp.path_vars[i, j] <= float(decomp.w_ub[j]) * z, name=f"path_active_i={i}_j={j}")
+    if getattr(decomp, "path_slack_vars", None) is not None:
+        decomp.model.addConstr(decomp.path_slack_vars[i] <= decomp.w_max * z, name=f"slack_active_i={i}")
+    if getattr(decomp, "subpath_vars", None) is not None:
+        for p in range(len(decomp.subpath_constr)):
+            decomp.model.addConstr(decomp.subpath_vars[i, p] <= z, name=f"subpath_active_i={i}_p={p}")
+    if i > 0 and decomp.symmetry_breaking is None:
+        # unused paths last; the orders of symmetry.py already sort the paths some other way
+        decomp.model.addConstr(decomp.used_vars[i - 1] >= z, name=f"used_order_i={i}")
+
+
+def set_objective(decomp):
+    # after the model's own objective (its error, if any) is set
+    if not decomp.used_vars:
+        return
+    if not decomp.error_vars():
+        decomp.model.setObjective(decomp.num_paths_var)
+    elif decomp.path_cost is not None:
+        decomp.num_paths_var.Obj = decomp.path_cost
+    decomp.model.update()
+
+
+def set_start(decomp, i: int, weights: list):
+    if getattr(decomp, "used_vars", None):
+        decomp.used_vars[i].Start = 1 if any(weight > 0 for weight in weights) else 0
+
+
+def set_path_range(decomp, k_min: int, k_max: int):
+    # only solutions with k_min..k_max paths in use
+    backends.keep_solution(decomp.model)
+    decomp.num_paths_var.LB = k_min
+    decomp.num_paths_var.UB = k_max
+    decomp.model.update()
+
+
+def solve(decomp, callback=None, budget=None):
+    # decomp.solve_model, plus the second, path-count stage of a lexicographic objective; True if the model
+    # has a solution. The second stage keeps the error within a rounding tolerance of the first stage's.
+    # budget (a ksearch.Budget) is shared between the stages.
+    lexicographic = bool(decomp.error_vars()) and decomp.path_cost is None
+    if budget is not None:
+        budget.apply(decomp.model, 2 if lexicographic else 1)
+    decomp.solve_model(callback)
+    if decomp.model.SolCount == 0 or not lexicographic:
+        return decomp.model.SolCount > 0
+    if budget is not None:
+        budget.apply(decomp.model)
+    error = decomp.model.ObjVal
+    backends.keep_solution(decomp.model)
+    decomp.model.addConstr(backends.quicksum(decomp.error_vars()) <= error + max(1e-6, 1e-6 * abs(error)), name="lexicographic_error")
+    decomp.model.setObjective(decomp.num_paths_var)
+    decomp.model.update()
+    decomp.solve_model(callback)
+    return decomp.model.SolCount > 0
@@ -0,0 +1,167 @@
+import numpy as np
+import networkx as nx
+import flowgraph
+
+# Graph reductions done once, before any model is built. In the exact and inexact variants a path of positive
+# weight puts that weight on every edge it takes, so an edge whose flow (upper bound) is 0 in every flow is
+# only ever used by paths of weight 0, which can as well take any other s-t route; such edges are dropped,
+# and then every edge left dangling by that (one whose tail can no longer be reached from the source, or
+# whose head no longer reaches the sink). Node labels are kept, so a path of the reduced graph is a path of
+# the original one and solutions map back as they are. Single zero entries f_uvj = 0 of a surviving edge
+# are left to the models, which fix pi[u,v,.,j] = 0 through its bound and drop its product rows.
+
+
+def prunable_edges(flow_graph: flowgraph.FlowGraph):
+    # boolean mask over the edges that no path of positive weight can use
+    prunable = (flow_graph.upper_flows() == 0).all(axis=1)
+    source, sink = flow_graph.source, flow_graph.sink
+    while True:
+        kept = ~prunable
+        in_degree = np.bincount(flow_graph.heads[kept], minlength=flow_graph.num_nodes)
+        out_degree = np.bincount(flow_graph.tails[kept], minlength=flow_graph.num_nodes)
+        dead = ((in_degree == 0) | (out_degree == 0))
+        dead[[source, sink]] = False
+        dangling = kept & (dead[flow_graph.tails] | dead[flow_graph.heads])
+        if not dangling.any():
+            return prunable
+        prunable |= dangling
+
+
+def reduce_graph(G: nx.DiGraph, flow_graph: flowgraph.FlowGraph, subpath_constr: list = []):
+    # (G, flow_graph) without the prunable edges, or the originals if there is nothing to prune or the input
+    # is not a valid multi-flow st-graph (the models' own checks then report why). An edge that a subpath
+    # constraint needs is never dropped: every path carries at least 1 there, so the model proves it infeasible.
+    if not flow_graph.is_st_graph() or not flow_graph.has_correct_num_flows() or flow_graph.flows.dtype.kind not in "biuf":
+        return G, flow_graph
+    prunable = prunable_edges(flow_graph)
+    if not prunable.any() or prunable.all():
+        return G, flow_graph
+    if any(prunable[flow_graph.edge_ids[edge]] for subpath in subpath_constr for edge in zip(subpath[:-1], subpath[1:])
+           if edge in flow_graph.edge_ids):
+        return G, flow_graph
+    reduced = nx.DiGraph(G.edge_subgraph([edge for edge, pruned in zip(flow_graph.edges, prunable) if not pruned]))
+    return reduced, flowgraph.FlowGraph(reduced, flow_graph.num_flows, flow_graph.flow_attr)
+
+
+def _merged_flows(first, second):
+    # the flows of two consecutive chain edges as the flows of one edge, or None if they do not merge: exact
+    # flows must be equal, bounds intersect (every path over the chain puts the same weight on all its edges)
+    if first.ndim == 1:
+        return first if np.array_equal(first, second) else None
+    merged = np.stack([np.maximum(first[:, 0], second[:, 0]), np.minimum(first[:, 1], second[:, 1])], axis=1)
+    return merged if (merged[:, 0] <= merged[:, 1]).all() else None
+
+
+def contract_chains(G: nx.DiGraph, flow_graph: flowgraph.FlowGraph, subpath_constr: list = []):
+    # (G, flow_graph, subpath_constr) with every run of edges through nodes of in- and out-degree 1 whose flows
+    # merge replaced by one edge, or the originals if there is no such run or the input is not a valid
+    # multi-flow st-graph. Every path that takes an edge of a run takes all of it, so the decompositions of the
+    # two graphs are the same; the contracted flow_graph.chains maps each new edge back onto its nodes, which
+    # result.model_paths expands. A run that would duplicate an edge keeps its last edge apart. Subpath
+    # constraints are rewritten onto the contracted edges, widened to the whole runs they touch.
+    if not flow_graph.is_st_graph() or not flow_graph.has_correct_num_flows() or flow_graph.flows.dtype.kind not in "biuf":
+        return G, flow_graph, subpath_constr
+    if any(len(subpath) < 2 for subpath in subpath_constr) or \
+            any(edge not in flow_graph.edge_ids for subpath in subpath_constr for edge in zip(subpath[:-1], subpath[1:])):
+        return G, flow_graph, subpath_constr
+    unary = (flow_graph.in_degree == 1) & (flow_graph.out_degree == 1)
+    position = np.empty(flow_graph.num_nodes, dtype=np.int64)
+    position[flow_graph.topological_order] = np.arange(flow_graph.num_nodes)
+    # runs start in topological order, so a run only ever begins where the one before it stopped
+    runs = []
+    contracted = np.zeros(flow_graph.num_edges, dtype=bool)
+    for e in np.argsort(position[flow_graph.tails], kind="stable"):
+        if contracted[e]:
+            continue
+        run, flows = [int(e)], flow_graph.flows[e]
+        contracted[e] = True
+        while unary[flow_graph.heads[run[-1]]]:
+            following = int(flow_graph.out_edges[flow_graph.out_ptr[flow_graph.heads[run[-1]]]])
+            merged = _merged_flows(flows, flow_graph.flows[following])
+            if merged is None:
+                break
+            run.append(following)
+            flows = merged
+            contracted[following] = True
+        runs.append((run, flows))
+    if len(runs) == flow_graph.num_edges:
+        return G, flow_graph, subpath_constr
+
+    # final edges as (first original edge, tail, head, original edges, flows), in the order of G.edges()
+    final = [(run[0], *flow_graph.edges[run[0]], run, flows) for run, flows in runs if len(run) == 1]
+    taken = {(u, v) for _, u, v, _, _ in final}
+    for run, flows in runs:
+        if len(run) == 1:
+            continue
+        u, v = flow_graph.edges[run[0]][0], flow_graph.edges[run[-1]][1]
+        if (u, v) in taken:
+            last = run.pop()
+            final.append((last, *flow_graph.edges[last], [last], flow_graph.flows[last]))
+            v = flow_graph.edges[run[-1]][1]
+            # the shortened run's flows, merged again without its last edge
+            flows = flow_graph.flows[run[0]]
+            for e in run[1:]:
+                flows = _merged_flows(flows, flow_graph.flows[e])
+        taken.add((u, v))
+        final.append((run[0], u, v, run, flows))
+    final.sort(key=lambda edge: edge[0])
+
+    reduced = nx.DiGraph()
+    reduced.graph.update(G.graph)
+    kept = {node for _, u, v, _, _ in final for node in (u, v)}
+    reduced.add_nodes_from((node, data) for node, data in G.nodes(data=True) if node in kept)
+    chains, final_edge = {}, {}
+    for _, u, v, run, flows in final:
+        data = dict(G.edges[flow_graph.edges[run[0]]])
+        data[flow_graph.flow_attr] = flows.tolist()
+        reduced.add_edge(u, v, **data)
+        if len(run) > 1:
+            chains[u, v] = [u] + [flow_graph.edges[e][1] for e in run]
+        for e in run:
+            final_edge[flow_graph.edges[e]] = (u, v)
+    reduced_flow_graph = flowgraph.FlowGraph(reduced, flow_graph.num_flows, flow_graph.flow_attr)
+    reduced_flow_graph.chains = chains
+
+    rewritten = []
+    for subpath in subpath_constr:
+        edges = [final_edge[edge] for edge in zip(subpath[:-1], subpath[1:])]
+        edges = [edge for n, edge in enumerate(edges) if n == 0 or edge != edges[n - 1]]
+        rewritten.append([edges[0][0]] + [v for u, v in edges])
+    return reduced, reduced_flow_graph, rewritten
+
+
+def collapse_flows(G: nx.DiGraph, flow_graph: flowgraph.FlowGraph, proportional: bool = False, subpath_constr: list = []):
+    # (G, flow_graph) with a single flow for every class of flows that are equal on all edges or, with
+    # proportional (only for exact flows and real weights), scalar multiples of one another; or the originals
+    # if all flows are distinct. A decomposition of the representative scaled by each member's factor
+    # decomposes the member, so the reduced problem has the same answer with fewer flows. The reduced
+    # flow_graph.flow_columns and flow_scales map it back, which result.model_weights applies. All-zero flows
+    # count as multiples (by 0) of any other flow. Nothing is merged under subpath constraints: a path covering
+    # a subpath needs weight sum_j w[i,j] >= 1 over all flows, which fewer flows turn into a stronger demand.
+    if subpath_constr or not flow_graph.has_correct_num_flows() or flow_graph.flows.dtype.kind not in "biuf" or flow_graph.num_edges == 0:
+        return G, flow_graph
+    proportional = proportional and flow_graph.flows.ndim == 2
+    columns = np.moveaxis(flow_graph.flows, 1, 0).reshape(flow_graph.num_flows, -1).astype(float)
+    scales = np.abs(columns).max(axis=1) if proportional else np.ones(flow_graph.num_flows)
+    keys = np.round(columns / np.where(scales > 0, scales, 1)[:, None], 9) if proportional else columns
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    representative = first[inverse.reshape(-1)]
+    zero = scales == 0
+    if proportional and zero.any() and not zero.all():
+        representative[zero] = np.flatnonzero(~zero)[0]
+    kept = np.unique(representative)
+    if len(kept) == flow_graph.num_flows:
+        return G, flow_graph
+    factors = scales / np.where(scales[representative] > 0, scales[representative], 1)
+    if not np.allclose(columns, factors[:, None] * columns[representative]):
+        return G, flow_graph
+
+    reduced = G.copy()
+    flows = flow_graph.flows[:, kept]
+    for edge, edge_flows in zip(flow_graph.edges, flows.tolist()):
+        reduced.edges[edge][flow_graph.flow_attr] = edge_flows
+    reduced_flow_graph = flowgraph.FlowGraph(reduced, len(kept), flow_graph.flow_attr)
+    reduced_flow_graph.chains = flow_graph.chains
+    reduced_flow_graph.flow_columns = np.searchsorted(kept, representative)
+    reduced_flow_graph.flow_scales = factors
+    return reduced, reduced_flow_graph
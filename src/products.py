@@ -0,0 +1,25 @@
+# How the product pi = x * w of a path-edge binary x and a bounded weight w (lb=0) is written into the model.
+# "mccormick" is the four-row big-M envelope, "reduced" drops its pi >= lb * x row, which the variable bound
+# pi >= 0 already implies, and "indicator" leaves the product to gurobi as x=1 -> pi=w and x=0 -> pi=0.
+LINEARIZATIONS = ("mccormick", "reduced", "indicator")
+
+
+def check_linearization(linearization: str):
+    if linearization not in LINEARIZATIONS:
+        print("uh oh")
+        raise ValueError(f"Unknown linearization {linearization}. Use one of {', '.join(LINEARIZATIONS)}.")
+
+
+def add_product_constraint(decomp, binary_var, continuous_var, product_var, lb, ub, name: str, product_ub=None):
+    # the non-McCormick forms of add_binary_continuous_product_constraint
+    model = decomp.model
+    if decomp.linearization == "indicator":
+        model.addGenConstrIndicator(binary_var, True, product_var - continuous_var == 0, name=name + "_on")
+        model.addGenConstrIndicator(binary_var, False, product_var == 0, name=name + "_off")
+    elif decomp.linearization == "reduced":
+        model.addConstr(product_var <= (ub if product_ub is None else product_ub) * binary_var, name=name + "_a")
+        if lb != 0:
+            model.addConstr(product_var >= lb * binary_var, name=name + "_b")
+        model.addConstr(product_var <= continuous_var - lb * (1 - binary_var), name=name + "_c")
+        model.addConstr(product_var >= continuous_var - ub * (1 - binary_var), name=name + "_d")
+
@@ -0,0 +1,115 @@
+import numpy as np
+import gurobipy as gb
+import backends
+
+
+class DecompResult:
+    # Solution of one k-path model. weights is a (k x m) array; the text report is only built by format().
+    # bound is the solver's proven bound on the objective; below a time limit or gap tolerance it can be short
+    # of objective, and status then says why the solve stopped.
+    def __init__(self, paths: list, weights, objective: float, k: int, status: int, slacks: list = None, subpath_claims: list = None,
+                 bound: float = None):
+        self.paths = paths
+        self.weights = np.asarray(weights)
+        self.objective = objective
+        self.k = k
+        self.status = status
+        self.bound = bound
+        self.slacks = slacks
+        self.subpath_claims = subpath_claims or []
+
+    def format(self) -> str:
+        lines = []
+        num_flows = self.weights.shape[1]
+        for i in range(len(self.paths)):
+            weights = [f" {self.weights[i, j]} for flow {j+1}" for j in range(num_flows)]
+            if num_flows > 1:
+                weights[-1] = " and" + weights[-1]
+            separator = "," if num_flows > 2 else ""
+            slack = f", with slack {self.slacks[i]}" if self.slacks is not None else ""
+            lines.append(f"Path {i+1} (carries weight{separator.join(weights)}{slack}):")
+            lines.append(", ".join(str(v) for v in self.paths[i]))
+        for i, p in self.subpath_claims:
+            lines.append(f"Path {i+1} satisfies constraint {p+1}")
+        return "".join(line + "\n" for line in lines)
+
+    @property
+    def gap(self):
+        # relative gap between objective and bound, as gurobi defines MIPGap
+        if self.objective is None or self.bound is None:
+            return None
+        if self.objective == self.bound:
+            return 0.0
+        return abs(self.objective - self.bound) / abs(self.objective) if self.objective != 0 else float("inf")
+
+    def __str__(self):
+        return self.format()
+
+
+def read_values(model, variables: list, shape, incumbent: backends.Incumbent = None):
+    # one getAttr call instead of one .X lookup per variable; from incumbent instead if given
+    values = incumbent.values(variables) if incumbent is not None else model.getAttr(gb.GRB.Attr.X, variables)
+    return np.array(values).reshape(shape)
+
+
+def used_paths(decomp, incumbent: backends.Incumbent = None) -> list:
+    # the indexes of the paths in use: all k, unless the model minimizes paths (see pathcount.py)
+    if not getattr(decomp, "used_vars", None):
+        return list(range(decomp.k))
+    used = read_values(decomp.model, [decomp.used_vars[i] for i in range(decomp.k)], decomp.k, incumbent) > 0.5
+    return [int(i) for i in used.nonzero()[0]]
+
+
+def model_weights(decomp, incumbent: backends.Incumbent = None):
+    weights = read_values(decomp.model, [decomp.path_vars[i, j] for i in range(decomp.k) for j in range(decomp.num_flows)],
+                          (decomp.k, decomp.num_flows), incumbent)
+    return decomp.flow_graph.expand_weights(weights[used_paths(decomp, incumbent)])
+
+
+def model_paths(decomp, incumbent: backends.Incumbent = None):
+    # follows, for every path, the unique chosen out-edge of each node from the source until the sink, and
+    # expands the contracted chains it takes back into the nodes of the graph the caller gave
+    flow_graph = decomp.flow_graph
+    used = read_values(decomp.model, [decomp.edge_vars[u, v, i] for u, v in flow_graph.edges for i in range(decomp.k)],
+                       (flow_graph.num_edges, decomp.k), incumbent) > 0.5
+    paths = []
+    for i in used_paths(decomp, incumbent):
+        next_node = np.full(flow_graph.num_nodes, -1, dtype=np.int64)
+        next_node[flow_graph.tails[used[:, i]]] = flow_graph.heads[used[:, i]]
+        node = flow_graph.source
+        path = [flow_graph.nodes[node]]
+        while next_node[node] >= 0:
+            node = next_node[node]
+            path.append(flow_graph.nodes[node])
+        paths.append(flow_graph.expand_path(path))
+    return paths
+
+
+def subpath_claims(decomp, incumbent: backends.Incumbent = None):
+    # (path, subpath constraint) pairs whose claim variable is set
+    claimed = read_values(decomp.model, [decomp.subpath_vars[i, p] for i in range(decomp.k) for p in range(len(decomp.subpath_constr))],
+                          (decomp.k, len(decomp.subpath_constr)), incumbent) > 0.5
+    claimed = claimed[used_paths(decomp, incumbent)]
+    return [(int(i), int(p)) for i, p in zip(*claimed.nonzero())]
+
+
+def model_result(decomp, slack_vars: list = None, subpaths: bool = False, incumbent: backends.Incumbent = None):
+    # slack_vars are the per-path slack variables of the variants that have them; without an incumbent
+    # only k and the status are filled in. With incumbent (a solution met during the solve) the result is
+    # read from it and its status is INPROGRESS.
+    if incumbent is not None:
+        objective, bound, status = incumbent.objective, incumbent.bound, gb.GRB.INPROGRESS
+    elif decomp.model.SolCount == 0:
+        return DecompResult([], decomp.flow_graph.expand_weights(np.zeros((0, decomp.num_flows))), None, decomp.k, decomp.model.status,
+                            bound=backends.attr(decomp.model, "ObjBound"))
+    else:
+        objective, bound, status = decomp.model.ObjVal, backends.attr(decomp.model, "ObjBound"), decomp.model.status
+    used = used_paths(decomp, incumbent)
+    slacks = read_values(decomp.model, slack_vars, len(slack_vars), incumbent)[used].tolist() if slack_vars is not None else None
+    if getattr(decomp, "used_vars", None):
+        # the model's objective may include the path count; report the error alone, which no bound covers
+        error_vars = decomp.error_vars()
+        objective = float(read_values(decomp.model, error_vars, len(error_vars), incumbent).sum()) if error_vars else 0.0
+        bound = None
+    return DecompResult(model_paths(decomp, incumbent), model_weights(decomp, incumbent), objective, len(used), status,
+                        slacks=slacks, subpath_claims=subpath_claims(decomp, incumbent) if subpaths else None, bound=bound)
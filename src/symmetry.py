@@ -0,0 +1,44 @@
+import backends
+
+# The k paths of every KCommonFlowDecomp* model are interchangeable, so any solution can be relabelled to
+# respect one fixed order on the paths. Only one order can be imposed at a time.
+SYMMETRY_BREAKING = ("weight", "source_edge")
+
+
+def check_symmetry_breaking(symmetry_breaking: str):
+    if symmetry_breaking is not None and symmetry_breaking not in SYMMETRY_BREAKING:
+        print("uh oh")
+        raise ValueError(
+            f"Unknown symmetry breaking {symmetry_breaking}. Use one of {', '.join(SYMMETRY_BREAKING)} or None."
+        )
+
+
+def add_path_order_constraint(decomp, i: int):
+    # orders path i-1 before path i: "weight" sorts paths by non-increasing weight for the first flow,
+    # "source_edge" by non-decreasing position of the edge they take out of the source
+    if i == 0 or decomp.symmetry_breaking is None:
+        return
+    if decomp.symmetry_breaking == "weight":
+        decomp.model.addConstr(decomp.path_vars[i - 1, 0] >= decomp.path_vars[i, 0], name=f"symmetry_weight_i={i}")
+    elif decomp.symmetry_breaking == "source_edge":
+        source, successors = source_edges(decomp.G)
+        decomp.model.addConstr(backends.quicksum(pos * decomp.edge_vars[source, v, i - 1] for pos, v in enumerate(successors)) <=
+                               backends.quicksum(pos * decomp.edge_vars[source, v, i] for pos, v in enumerate(successors)),
+                               name=f"symmetry_source_edge_i={i}")
+
+
+def sort_paths(decomp, paths: list, weights: list):
+    # relabels a known solution so that it satisfies the order imposed by add_path_order_constraint
+    if decomp.symmetry_breaking == "weight":
+        order = sorted(range(len(paths)), key=lambda i: -weights[i][0])
+    elif decomp.symmetry_breaking == "source_edge":
+        source, successors = source_edges(decomp.G)
+        order = sorted(range(len(paths)), key=lambda i: successors.index(paths[i][1]))
+    else:
+        return paths, weights
+    return [paths[i] for i in order], [weights[i] for i in order]
+
+
+def source_edges(G):
+    source = next(v for v in G.nodes() if G.in_degree(v) == 0)
+    return source, list(G.successors(source))
@@ -140,4 +140,31 @@ def get_max_inexact_flow(G: nx.DiGraph, num_flows: int, flow_attr: str = "flow")
                 f"Edge ({u},{v}) has negative flow value {data[flow_attr]}. All flow values must be >=0."
             )
         w_max = max(w_max, max(data[flow_attr][1]))
-    return w_max
\ No newline at end of file
+    return w_max
+
+def get_k_lower_bound(G: nx.DiGraph, num_flows: int, flow_attr: str = "flow", threshold: float = 0, inexact: bool = False) -> int:
+    # Every edge whose flow cannot be explained away (above `threshold`, or with a positive lower bound when
+    # `inexact`) must lie on some path, so k is at least the minimum number of s-t paths covering those edges.
+    # That is a min-flow with lower bound 1 on the covered edges, solved as a min-cost circulation.
+    if not check_correct_num_flows(G, num_flows, flow_attr):
+        print("uh oh")
+        raise ValueError(
+            "Some edges missing flows"
+        )
+    source = next(v for v in G.nodes() if G.in_degree(v) == 0)
+    sink = next(v for v in G.nodes() if G.out_degree(v) == 0)
+    H = nx.DiGraph()
+    H.add_nodes_from(G.nodes(), demand=0)
+    covered = 0
+    for u, v, data in G.edges(data=True):
+        H.add_edge(u, v, weight=0)
+        flows = [flow[0] for flow in data[flow_attr]] if inexact else data[flow_attr]
+        if any(flow > threshold for flow in flows):
+            H.nodes[u]["demand"] += 1
+            H.nodes[v]["demand"] -= 1
+            covered += 1
+    if covered == 0:
+        return 1
+    H.add_edge(sink, source, weight=1)
+    num_paths, _ = nx.network_simplex(H)
+    return max(1, num_paths)
@@ -0,0 +1,62 @@
+import os
+import sys
+import functools
+import contextlib
+import io
+import pytest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import CommonFlowDecompInexact as CFDI
+import CommonFlowDecompMinErr as CFDME
+import CommonFlowDecompMinPathErr as CFDMPE
+import generator
+
+# every variant runs on both backends; on a planted instance each has a unique optimal k and objective
+VARIANTS = {
+    "exact": lambda G, **kw: CFD.CommonFlowDecomp(G, 2, 5, **kw),
+    "bounded": lambda G, **kw: CFDBE.CommonFlowDecompBoundedErr(generator.add_noise(G, 1, 0), 2, 5, 1, **kw),
+    "inexact": lambda G, **kw: CFDI.CommonFlowDecompInexact(generator.widen(G, 1), 2, 5, **kw),
+    "min_err": lambda G, **kw: CFDME.CommonFlowDecompMinErr(generator.add_noise(G, 1, 0), 2, 4, **kw),
+    "min_path_err": lambda G, **kw: CFDMPE.CommonFlowDecompMinPathErr(generator.add_noise(G, 1, 0), 2, 4, **kw),
+}
+SEEDS = [0, 1]
+
+
+def planted(seed):
+    return generator.planted_decomposition(8, 3, 2, seed, max_weight=6)[0]
+
+
+def solve(variant, seed, backend):
+    decomp = VARIANTS[variant](planted(seed), backend=backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        decomp.solve()
+    return decomp.result
+
+
+@functools.lru_cache(maxsize=None)
+def reference(variant, seed):
+    result = solve(variant, seed, "gurobi")
+    return result.k, float(result.objective)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("variant", sorted(VARIANTS))
+@pytest.mark.parametrize("backend", ["gurobi", "highs"])
+def test_backends_agree(backend, variant, seed):
+    result = solve(variant, seed, backend)
+    k, objective = reference(variant, seed)
+    assert result.k == k
+    assert float(result.objective) == pytest.approx(objective, abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("backend", ["gurobi", "highs"])
+def test_exact_decomposition_is_valid(backend, seed):
+    G = planted(seed)
+    result = solve("exact", seed, backend)
+    for u, v, data in G.edges(data=True):
+        carried = sum(result.weights[i] for i, path in enumerate(result.paths) if (u, v) in zip(path[:-1], path[1:]))
+        assert np.allclose(carried, data["flow"])
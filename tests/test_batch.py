@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import batch
+import generator
+
+
+class Scripted:
+    # a driver that solves, raises, kills its worker or hangs, as its params say
+    def __init__(self, G, action: str = "solve"):
+        self.G = G
+        self.action = action
+
+    def solve(self):
+        if self.action == "raise":
+            raise ValueError("bad input")
+        if self.action == "exit":
+            os._exit(3)
+        if self.action == "hang":
+            time.sleep(60)
+        return CFD.CommonFlowDecomp(self.G, 2, 5).solve()
+
+
+def planted(seed):
+    return generator.planted_decomposition(8, 3, 2, seed, max_weight=6)[0]
+
+
+def test_failures_and_timeouts_stay_with_their_job():
+    actions = ["solve", "raise", "exit", "hang", "solve"]
+    jobs = [(planted(seed), {"action": action}) for seed, action in enumerate(actions)]
+    start = time.perf_counter()
+    results = sorted(batch.solve_batch(jobs, driver_class=Scripted, workers=2, timeout=3), key=lambda result: result.index)
+    assert time.perf_counter() - start < 30
+    assert [result.status for result in results] == ["ok", "error", "error", "timeout", "ok"]
+    assert results[1].error == "ValueError: bad input"
+    assert "exited with code 3" in results[2].error
+    for result, seed in zip([results[0], results[4]], [0, 4]):
+        assert result.value == CFD.CommonFlowDecomp(planted(seed), 2, 5).solve()
+
+
+def test_invalid_graph_fails_only_its_job():
+    cyclic = nx.DiGraph([("a", "b"), ("b", "a")])
+    nx.set_edge_attributes(cyclic, {edge: [1, 1] for edge in cyclic.edges()}, "flow")
+    jobs = [(planted(0), {"num_flows": 2, "maximum_k": 5}), (cyclic, {"num_flows": 2, "maximum_k": 5})]
+    results = sorted(batch.solve_batch(jobs, workers=2), key=lambda result: result.index)
+    assert [result.status for result in results] == ["ok", "error"]
+    assert "not a directed acyclic graph" in results[1].error
@@ -0,0 +1,111 @@
+import os
+import sys
+import pickle
+import pytest
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import cache
+import flowgraph
+import generator
+
+
+def planted(seed=0):
+    return generator.planted_decomposition(8, 3, 2, seed, max_weight=6)[0]
+
+
+def key(G, variant="CommonFlowDecomp", subpath_constr=[], **params):
+    return cache.problem_key(variant, flowgraph.FlowGraph(G, 2, "flow"), subpath_constr, **params)
+
+
+def test_key_ignores_edge_insertion_order():
+    G = planted()
+    reordered = nx.DiGraph()
+    reordered.add_edges_from(reversed(list(G.edges(data=True))))
+    assert key(reordered) == key(G)
+    assert key(G) == key(planted())
+
+
+def test_key_changes_with_what_changes_the_answer():
+    G = planted()
+    u, v = next(iter(G.edges()))
+    H = G.copy()
+    H[u][v]["flow"] = [H[u][v]["flow"][0] + 1, H[u][v]["flow"][1]]
+    path = generator.planted_decomposition(8, 3, 2, 0, max_weight=6)[1][0]
+    keys = [key(G), key(H), key(G, subpath_constr=[path]), key(G, variant="CommonFlowDecompInexact"),
+            key(G, error_bound=1), key(G, error_bound=2)]
+    assert len(set(keys)) == len(keys)
+
+
+def test_hit_skips_the_solve():
+    store = cache.MemoryCache()
+    first = CFD.CommonFlowDecomp(planted(), 2, 5, cache=store)
+    paths = first.solve()
+    assert first.stats.models
+    second = CFD.CommonFlowDecomp(planted(), 2, 5, cache=store)
+    assert second.solve() == paths
+    assert second.stats.models == []
+    assert second.result.k == first.result.k
+
+
+def test_bounded_error_is_part_of_the_key():
+    store = cache.MemoryCache()
+    G = generator.add_noise(planted(), 1, 0)
+    CFDBE.CommonFlowDecompBoundedErr(G, 2, 5, 1, cache=store).solve()
+    other = CFDBE.CommonFlowDecompBoundedErr(G, 2, 5, 2, cache=store)
+    other.solve()
+    assert other.stats.models
+
+
+def test_memory_cache_evicts_least_recently_used_by_bytes():
+    value = list(range(100))
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    store = cache.MemoryCache(max_bytes=2 * size)
+    store.put("a", value)
+    store.put("b", value)
+    assert store.get("a") == value
+    store.put("c", value)
+    assert store.get("b") is None
+    assert store.get("a") == value and store.get("c") == value
+    assert len(store) == 2 and store.size == 2 * size
+
+
+def test_memory_cache_returns_copies():
+    store = cache.MemoryCache()
+    store.put("a", [1, 2])
+    store.get("a").append(3)
+    assert store.get("a") == [1, 2]
+
+
+def test_disk_cache_reloads_and_writes_atomically(tmp_path, monkeypatch):
+    store = cache.DiskCache(str(tmp_path))
+    store.put("a", {"paths": [["s", "t"]]})
+    assert cache.DiskCache(str(tmp_path)).get("a") == {"paths": [["s", "t"]]}
+
+    def interrupted(value, file, protocol=None):
+        file.write(b"half an entry")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cache.pickle, "dump", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        store.put("a", {"paths": []})
+    monkeypatch.undo()
+    assert cache.DiskCache(str(tmp_path)).get("a") == {"paths": [["s", "t"]]}
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".pkl")] == ["a.pkl"]
+
+
+def test_cached_infeasibility_raises_the_lower_bound():
+    store = cache.MemoryCache()
+    options = dict(use_lower_bound=False, use_heuristic=False, cache=store)
+    first = CFD.CommonFlowDecomp(planted(), 2, 5, **options)
+    first.solve()
+    k = first.result.k
+    assert k > 1
+    assert cache.known_infeasible(store, first.problem_key) == k - 1
+    # a larger maximum_k misses the cached answer, but not the k already proven infeasible
+    second = CFD.CommonFlowDecomp(planted(), 2, 6, **options)
+    second.solve()
+    assert second.k_lower_bound == k
+    assert min(record["k"] for record in second.stats.models) == k
@@ -0,0 +1,109 @@
+import os
+import sys
+import pytest
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import CommonFlowDecompInexact as CFDI
+import CommonFlowDecompMinErr as CFDME
+import CommonFlowDecompMinPathErr as CFDMPE
+import generator
+
+
+def chain(flows):
+    G = nx.DiGraph()
+    G.add_edge("s", "a", flow=flows)
+    G.add_edge("a", "t", flow=flows)
+    return G
+
+
+def test_exact_all_zero_flows():
+    # the greedy heuristic needs no path here, which must not cap the search at k = 0
+    decomp = CFD.CommonFlowDecomp(chain([0]), 1, 3)
+    assert decomp.solve() == [["s", "a", "t"]]
+    assert decomp.result.k == 1
+
+
+def test_inexact_all_zero_flows():
+    decomp = CFDI.CommonFlowDecompInexact(chain([(0, 0)]), 1, 3)
+    assert decomp.solve().startswith("Found a solution with 1 distinct paths")
+    assert decomp.result.k == 1
+
+
+def test_bounded_all_zero_flows():
+    decomp = CFDBE.CommonFlowDecompBoundedErr(chain([0]), 1, 3, 2)
+    assert decomp.solve().startswith("Found a solution with 1 distinct paths")
+    assert decomp.result.k == 1
+
+
+def test_branch_price_all_zero_flows():
+    decomp = CFD.CommonFlowDecomp(chain([0]), 1, 3, engine="branch_price")
+    assert decomp.solve() == [["s", "a", "t"]]
+    assert decomp.result.k == 1
+
+
+def test_large_flows_must_conserve_exactly():
+    G = nx.DiGraph()
+    G.add_edge("s", "a", flow=[200000])
+    G.add_edge("a", "t", flow=[200001])
+    with pytest.raises(ValueError, match="does not conserve flow"):
+        CFD.CommonFlowDecomp(G, 1, 3).solve()
+
+
+@pytest.mark.parametrize("presolve", [True, False])
+def test_non_conserving_flows_raise_before_presolve(presolve):
+    # presolve drops s->a, after which the rest conserves flow
+    G = nx.DiGraph()
+    G.add_edge("s", "a", flow=[0])
+    G.add_edge("a", "t", flow=[5])
+    G.add_edge("s", "t", flow=[5])
+    with pytest.raises(ValueError, match="does not conserve flow"):
+        CFD.CommonFlowDecomp(G, 1, 3, presolve=presolve)
+
+
+@pytest.mark.parametrize("edges, message", [
+    ([("a", "b"), ("b", "a")], "not a directed acyclic graph"),
+    ([("s", "a"), ("x", "a"), ("a", "t")], "not an st graph"),
+])
+def test_invalid_graphs_raise_before_the_lower_bound(edges, message):
+    G = nx.DiGraph()
+    G.add_edges_from(edges, flow=[1])
+    with pytest.raises(ValueError, match=message):
+        CFD.CommonFlowDecomp(G, 1, 3)
+    with pytest.raises(ValueError, match=message):
+        CFDBE.CommonFlowDecompBoundedErr(G, 1, 3, 1)
+    G = nx.DiGraph()
+    G.add_edges_from(edges, flow=[(1, 1)])
+    with pytest.raises(ValueError, match=message):
+        CFDI.CommonFlowDecompInexact(G, 1, 3)
+
+
+def test_non_numeric_flows_raise_before_the_lower_bound():
+    with pytest.raises(ValueError, match="must be int or float"):
+        CFD.CommonFlowDecomp(chain(["1"]), 1, 3)
+    with pytest.raises(ValueError, match="must be int or float"):
+        CFDBE.CommonFlowDecompBoundedErr(chain(["1"]), 1, 3, 1)
+    with pytest.raises(ValueError, match="bounds expressed as tuples"):
+        CFDI.CommonFlowDecompInexact(chain(["1"]), 1, 3)
+
+
+def test_min_err_single_keeps_a_path_at_a_tie():
+    # the noise leaves a path of weight 0 as good as the planted ones, which must not end in no path at all
+    G = generator.add_noise(generator.planted_decomposition(8, 2, 1, 2, max_weight=4)[0], 3, 2)
+    decomp = CFDME.CommonFlowDecompMinErr(G, 1, 3, search="single")
+    decomp.solve()
+    assert decomp.result.k >= 1
+
+
+def test_min_err_returns_the_paths_of_its_result():
+    # k + 1 paths do no better than k here, which stops the search with the k paths as the answer
+    G = generator.add_noise(generator.planted_decomposition(8, 2, 1, 0, max_weight=4)[0], 3, 0)
+    decomp = CFDME.CommonFlowDecompMinErr(G, 1, 4)
+    paths = decomp.solve()
+    assert sorted(paths) == sorted(decomp.result.paths)
+    assert len(paths) == decomp.result.k
+    decomp = CFDMPE.CommonFlowDecompMinPathErr(G, 1, 4)
+    solution = decomp.solve()
+    assert f"Optimal solution: {decomp.result.k} distinct paths" in solution
@@ -0,0 +1,93 @@
+import os
+import sys
+import pytest
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import graphio
+import generator
+
+FORMATS = {
+    "text": (graphio.write_text, graphio.read_text),
+    "binary": (graphio.write_binary, graphio.read_binary),
+}
+
+
+def edges(G):
+    return sorted((u, v, data["flow"]) for u, v, data in G.edges(data=True))
+
+
+def numbered(G):
+    # the ids the writers give non-integer nodes
+    return nx.relabel_nodes(G, {v: n for n, v in enumerate(G.nodes())})
+
+
+def named(G, name):
+    G.graph["name"] = name
+    return G
+
+
+def round_trip(tmp_path, fmt, graphs, **kwargs):
+    write, read = FORMATS[fmt]
+    path = str(tmp_path / f"graphs.{fmt}")
+    assert write(path, graphs) == len(graphs)
+    return list(read(path, **kwargs))
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_round_trip(tmp_path, fmt):
+    graphs = [named(generator.planted_decomposition(10, 3, m, seed)[0], f"sample_{seed}") for seed, m in [(0, 1), (1, 3)]]
+    read = round_trip(tmp_path, fmt, graphs)
+    assert [G.graph["name"] for G in read] == ["sample_0", "sample_1"]
+    assert [edges(G) for G in read] == [edges(numbered(G)) for G in graphs]
+    assert list(graphio.read_graphs(str(tmp_path / f"graphs.{fmt}")))[1].graph["name"] == "sample_1"
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_interval_bounds(tmp_path, fmt):
+    G = generator.widen(generator.planted_decomposition(10, 3, 2, 0)[0], 2)
+    graph = round_trip(tmp_path, fmt, [G], arrays=True)[0]
+    assert graph.bounds and graph.flows.shape == (G.number_of_edges(), 2, 2)
+    assert edges(graph.to_digraph()) == [(u, v, [list(bound) for bound in flows]) for u, v, flows in edges(numbered(G))]
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_int_and_float_flows_keep_their_type(tmp_path, fmt):
+    ints = nx.DiGraph([("0", "1", {"flow": [3, 4]})])
+    floats = nx.DiGraph([("0", "1", {"flow": [0.5, 4.0]})])
+    read_ints, read_floats = round_trip(tmp_path, fmt, [ints, floats])
+    assert [type(f) for f in read_ints.edges[0, 1]["flow"]] == [int, int]
+    assert read_floats.edges[0, 1]["flow"] == [0.5, 4.0]
+    assert [type(f) for f in read_floats.edges[0, 1]["flow"]] == [float, float]
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_empty_graphs(tmp_path, fmt):
+    read = round_trip(tmp_path, fmt, [named(nx.DiGraph(), "empty"), nx.DiGraph([(0, 1, {"flow": [1]})])])
+    assert read[0].graph["name"] == "empty" and read[0].number_of_edges() == 0
+    assert edges(read[1]) == [(0, 1, [1])]
+    assert round_trip(tmp_path, fmt, []) == []
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_non_integer_nodes_are_numbered_in_node_order(tmp_path, fmt):
+    G = nx.DiGraph()
+    G.add_nodes_from(["s", "a", "t"])
+    G.add_edge("s", "a", flow=[2])
+    G.add_edge("a", "t", flow=[2])
+    G.add_edge("s", "t", flow=[1])
+    assert edges(round_trip(tmp_path, fmt, [G])[0]) == [(0, 1, [2]), (0, 2, [1]), (1, 2, [2])]
+
+
+def test_ragged_flows_are_rejected(tmp_path):
+    path = tmp_path / "ragged.txt"
+    path.write_text("# graph number = 0 name = ragged\n3\n0 1 5 3\n1 2 5\n")
+    with pytest.raises(ValueError, match="different numbers of flows"):
+        list(graphio.read_text(str(path)))
+
+
+def test_edges_need_a_header(tmp_path):
+    path = tmp_path / "headless.txt"
+    path.write_text("3\n0 1 5\n")
+    with pytest.raises(ValueError, match="expected a '# graph' header"):
+        list(graphio.read_text(str(path)))
@@ -0,0 +1,166 @@
+import os
+import sys
+import pytest
+import numpy as np
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import CommonFlowDecompInexact as CFDI
+import generator
+
+
+def planted(seed, num_flows=2):
+    return generator.planted_decomposition(8, 3, num_flows, seed, max_weight=6)[0]
+
+
+def solve(decomp):
+    decomp.solve()
+    return decomp.result
+
+
+def assert_decomposes(G, result, error_bound=0):
+    # the paths are paths of G whose weights add up to its flows (up to error_bound, or within its bounds) on
+    # every edge
+    for path in result.paths:
+        assert all(G.has_edge(u, v) for u, v in zip(path[:-1], path[1:]))
+    for u, v, data in G.edges(data=True):
+        on_edge = [i for i, path in enumerate(result.paths) if (u, v) in zip(path[:-1], path[1:])]
+        carried = result.weights[on_edge].sum(axis=0)
+        flows = np.array(data["flow"], dtype=float)
+        if flows.ndim == 2:
+            assert np.all(flows[:, 0] - 1e-6 <= carried) and np.all(carried <= flows[:, 1] + 1e-6)
+        else:
+            assert np.all(np.abs(carried - flows) <= error_bound + 1e-6)
+
+
+def with_zero_edges(G, zero=0):
+    # G plus edges that carry no flow: shortcuts between its nodes and a detour through a new node
+    H = G.copy()
+    order = list(nx.topological_sort(G))
+    shortcuts = [(u, v) for n, u in enumerate(order) for v in order[n + 2:] if not G.has_edge(u, v)]
+    zeros = [zero] * len(next(iter(G.edges(data=True)))[2]["flow"])
+    H.add_edges_from(shortcuts[:4], flow=zeros)
+    H.add_edges_from([(order[0], "detour"), ("detour", order[-1])], flow=zeros)
+    return H
+
+
+def subdivided(G):
+    # G with every edge u->v split into the chain u->(u-v)->v, both carrying its flows
+    H = nx.DiGraph()
+    for u, v, data in G.edges(data=True):
+        H.add_edge(u, f"{u}-{v}", **data)
+        H.add_edge(f"{u}-{v}", v, **data)
+    return H
+
+
+def with_flow_copies(G, factors):
+    # G with one more flow per factor, each the first flow scaled by that factor
+    H = G.copy()
+    for u, v, data in H.edges(data=True):
+        data["flow"] = list(data["flow"]) + [factor * data["flow"][0] for factor in factors]
+    return H
+
+
+def diamond(flows):
+    G = nx.DiGraph()
+    for u, v in [("s", "a"), ("s", "b"), ("a", "t"), ("b", "t")]:
+        G.add_edge(u, v, flow=list(flows))
+    return G
+
+
+@pytest.mark.parametrize("presolve", [True, False])
+def test_equal_flows_are_kept_apart_under_subpath_constraints(presolve):
+    # merged into one flow of 0.5, neither path could carry a total weight of 1 over its subpath
+    decomp = CFD.CommonFlowDecomp(diamond([0.5, 0.5]), 2, 3, subpath_constr=[["s", "a", "t"], ["s", "b", "t"]],
+                                  presolve=presolve)
+    assert sorted(decomp.solve()) == [["s", "a", "t"], ["s", "b", "t"]]
+    assert decomp.num_flows == 2
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_dropping_zero_edges_keeps_the_answer(seed):
+    G = with_zero_edges(planted(seed))
+    reduced = CFD.CommonFlowDecomp(G, 2, 5)
+    assert reduced.G.number_of_edges() < G.number_of_edges() and "detour" not in reduced.G
+    result = solve(reduced)
+    assert result.k == solve(CFD.CommonFlowDecomp(G, 2, 5, presolve=False)).k
+    assert_decomposes(G, result)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_dropping_zero_edges_keeps_the_inexact_answer(seed):
+    G = with_zero_edges(generator.widen(planted(seed), 1), zero=(0, 0))
+    reduced = CFDI.CommonFlowDecompInexact(G, 2, 5)
+    assert "detour" not in reduced.G
+    result = solve(reduced)
+    assert result.k == solve(CFDI.CommonFlowDecompInexact(G, 2, 5, presolve=False)).k
+    assert_decomposes(G, result)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_contracting_chains_keeps_the_answer(seed):
+    G = subdivided(planted(seed))
+    reduced = CFD.CommonFlowDecomp(G, 2, 5)
+    assert reduced.flow_graph.chains and reduced.G.number_of_nodes() < G.number_of_nodes()
+    result = solve(reduced)
+    assert result.k == solve(CFD.CommonFlowDecomp(G, 2, 5, presolve=False)).k
+    assert_decomposes(G, result)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_contracting_chains_keeps_subpaths(seed):
+    G, paths, _ = generator.planted_decomposition(8, 3, 2, seed, max_weight=6)
+    G = subdivided(G)
+    # a planted path in G without its end nodes, so that it starts and ends inside a chain
+    subpath = [node for u, v in zip(paths[0][:-1], paths[0][1:]) for node in (u, f"{u}-{v}")][1:]
+    reduced = CFD.CommonFlowDecomp(G, 2, 5, subpath_constr=[subpath])
+    assert reduced.flow_graph.chains
+    result = solve(reduced)
+    assert result.k == solve(CFD.CommonFlowDecomp(G, 2, 5, subpath_constr=[subpath], presolve=False)).k
+    assert_decomposes(G, result)
+    assert any(path[n:n + len(subpath)] == subpath for path in result.paths for n in range(len(path)))
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_contracting_chains_keeps_the_bounded_error_answer(seed):
+    G = subdivided(generator.add_noise(planted(seed), 1, seed))
+    reduced = CFDBE.CommonFlowDecompBoundedErr(G, 2, 5, 1)
+    assert reduced.flow_graph.chains
+    result = solve(reduced)
+    assert result.k == solve(CFDBE.CommonFlowDecompBoundedErr(G, 2, 5, 1, presolve=False)).k
+    assert_decomposes(G, result, error_bound=1)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_merging_equal_flows_keeps_the_answer(seed):
+    G = with_flow_copies(planted(seed), [1, 1])
+    reduced = CFD.CommonFlowDecomp(G, 4, 5)
+    assert reduced.num_flows == 2
+    result = solve(reduced)
+    assert result.weights.shape == (result.k, 4)
+    assert result.k == solve(CFD.CommonFlowDecomp(G, 4, 5, presolve=False)).k
+    assert_decomposes(G, result)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_merging_proportional_flows_keeps_the_answer(seed):
+    G = with_flow_copies(planted(seed), [2, 0])
+    assert CFD.CommonFlowDecomp(G, 4, 5).num_flows == 4
+    reduced = CFD.CommonFlowDecomp(G, 4, 5, proportional_flows=True)
+    # the doubled flow joins the first one, and the all-zero flow is a multiple (by 0) of either
+    assert reduced.num_flows == 2
+    result = solve(reduced)
+    assert result.k == solve(CFD.CommonFlowDecomp(G, 4, 5, presolve=False)).k
+    assert_decomposes(G, result)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_merging_equal_bounds_keeps_the_inexact_answer(seed):
+    G = generator.widen(with_flow_copies(planted(seed), [1]), 1)
+    reduced = CFDI.CommonFlowDecompInexact(G, 3, 5)
+    assert reduced.num_flows == 2
+    result = solve(reduced)
+    assert result.k == solve(CFDI.CommonFlowDecompInexact(G, 3, 5, presolve=False)).k
+    assert_decomposes(G, result)
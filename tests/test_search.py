@@ -0,0 +1,45 @@
+import os
+import sys
+import contextlib
+import io
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import CommonFlowDecomp as CFD
+import CommonFlowDecompBoundedErr as CFDBE
+import CommonFlowDecompInexact as CFDI
+import CommonFlowDecompMinErr as CFDME
+import CommonFlowDecompMinPathErr as CFDMPE
+import generator
+
+# the feasibility variants start without the heuristic and the lower bound, so that the search walks k up from 1
+WALK = dict(use_lower_bound=False, use_heuristic=False)
+VARIANTS = {
+    "exact": lambda G, **kw: CFD.CommonFlowDecomp(G, 2, 6, **WALK, **kw),
+    "bounded": lambda G, **kw: CFDBE.CommonFlowDecompBoundedErr(generator.add_noise(G, 1, 0), 2, 6, 1, **WALK, **kw),
+    "inexact": lambda G, **kw: CFDI.CommonFlowDecompInexact(generator.widen(G, 1), 2, 6, **WALK, **kw),
+    "min_err": lambda G, **kw: CFDME.CommonFlowDecompMinErr(generator.add_noise(G, 1, 0), 2, 5, **kw),
+    "min_path_err": lambda G, **kw: CFDMPE.CommonFlowDecompMinPathErr(generator.add_noise(G, 1, 0), 2, 5, **kw),
+}
+
+
+def solve(variant, seed, **kwargs):
+    decomp = VARIANTS[variant](generator.planted_decomposition(9, 4, 2, seed, max_weight=6)[0], **kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        decomp.solve()
+    return decomp.result
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("variant", sorted(VARIANTS))
+def test_incremental_model_matches_a_rebuilt_one(variant, seed):
+    rebuilt = solve(variant, seed)
+    grown = solve(variant, seed, incremental=True)
+    assert grown.k == rebuilt.k
+    assert float(grown.objective) == pytest.approx(float(rebuilt.objective), abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("variant", ["bounded", "exact", "inexact"])
+def test_galloping_search_finds_the_linear_k(variant, seed):
+    assert solve(variant, seed, search="galloping").k == solve(variant, seed).k